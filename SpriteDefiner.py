@@ -8,79 +8,311 @@ SpriteDefiner - Enhanced Visual Sprite Definition Tool for Pyxel (Ver.2)
 # :jp 画面に出力する文字列は英語にしてください。pyxelは日本語フォントを表示できません
 # :en Please use English for the text displayed on the screen, as Pyxel cannot display Japanese fonts.
 
+import time
+
+# :jp 起動時間計測用（インポート開始時刻）
+# :en For startup timing (time when imports started)
+_IMPORT_START = time.perf_counter()
+
 import pyxel
 import os
 import sys
 import json
-import shutil
+import atexit
+import argparse
 
 # :jp SpriteDefinerDlgモジュールへのパスを追加
 # :en Add the path to the SpriteDefinerDlg module
 sys.path.append(os.path.join(os.path.dirname(__file__), 'SpriteDefinerDlg'))
 
-from dialog_manager import DialogManager
-from file_open_dialog import FileOpenDialogController
-from sprite_edit_dialog import SpriteEditDialogController
+from label_cache import LabelCache
+from dialog_events import DialogEventQueue
+from input_replay import LiveInput, RecordingInput, ReplayInput, replay_session, report_timings
+from sprite_model import Sprite, FieldSchema, sprites_from_json
+import bank_analysis
+import pyxres_reader
+from palette_swap import PaletteVariantCache, sprite_palettes
+from tilemap_view import TilemapChunkCache, CHUNK_TILES, tile_names
+from hot_reload import HotReloadServer
+from tile_similarity import TileSimilarityIndex
+from viewport import Viewport
+from recent_edits import RecentEdits
+from sprite_wal import WriteAheadLog, replay as replay_wal
+import sprite_storage
+from workspace import ProjectCache, capture_banks, restore_banks, DEFAULT_BUDGET_MB
+
+_IMPORT_END = time.perf_counter()
+
+# :jp テンプレート初期値（画面上は "(No Name)" として表示）
+# :en Template placeholder values (displayed as "(No Name)")
+PLACEHOLDER_NAMES = frozenset(["Reserved Field", "SpriteName", "ActionName", "Animation Number"])
+
+# :jp スプライトシート描画時の透明色（当たり判定マスクも同じ色を透明として扱う）
+# :en Transparent color used when drawing the sprite sheet (collision masks use the same key)
+TRANSPARENT_COLOR = 0
+
+# :jp タイル使用頻度ヒートマップの色（低→高）と警告マーカーの色
+# :en Tile usage heatmap colors (low -> high) and flag marker colors
+USAGE_HEAT_COLORS = (pyxel.COLOR_GREEN, pyxel.COLOR_YELLOW, pyxel.COLOR_RED)
+DEFINED_UNUSED_COLOR = pyxel.COLOR_PINK
+USED_UNDEFINED_COLOR = pyxel.COLOR_ORANGE
+
+# :jp ミニマップの縮小率と、スプライト密度を数える領域の大きさ（ピクセル）
+# :en Minimap downscale factor, and the region size (pixels) used to count sprite density
+MINIMAP_SCALE = 4
+MINIMAP_DENSITY_BLOCK = 32
+
+# :jp スプライトシート・タイルマップの表示領域の大きさ（256 - 16 の余白 / 256 - 56 の上部コマンド領域）
+# :en Size of the sprite sheet / tilemap view (256 - 16 margin / 256 - 56 command area on top)
+VIEW_WIDTH = 240
+VIEW_HEIGHT = 200
+
+# :jp マウスが乗っているタイルの枠の色
+# :en Outline color of the tile under the mouse
+HOVER_TILE_COLOR = pyxel.COLOR_LIGHT_BLUE
+
+# :jp 最近編集したスプライトへジャンプするキー（パネルの上から順）
+# :en Keys jumping to recently edited sprites (top of the panel first)
+RECENT_EDIT_KEYS = (pyxel.KEY_1, pyxel.KEY_2, pyxel.KEY_3, pyxel.KEY_4, pyxel.KEY_5, pyxel.KEY_6)
+
+# :jp 似ているタイルの検索件数と枠の色
+# :en Number of similar tiles to find, and their highlight color
+SIMILAR_TOP_K = 8
+SIMILAR_TILE_COLOR = pyxel.COLOR_CYAN
 
 class SpriteDefiner:
-    def __init__(self):
+    def __init__(self, startup_timing=False, cache_mb=DEFAULT_BUDGET_MB, headless=False, record_file=None, replay_input=None,
+                 hot_reload_port=None, read_only=False):
+        # :jp 起動時間計測モード
+        # :en Startup timing mode
+        self.startup_timing = startup_timing
+        self.init_start = time.perf_counter()
+        self.run_start = None
+        self.startup_timing_reported = False
+
+        # :jp 読み取り専用モード（ヘッドレス描画・再生）: JSON・テンプレート・編集ログを一切書き込まない
+        # :en Read-only mode (headless render, replay): never writes the JSON, the template copy or the edit log
+        self.read_only = read_only
+
         # :jp ウィンドウ設定
         # :en Window settings
         self.WIDTH = 256
         self.HEIGHT = 256
 
-        # :jp Pyxelを初期化
-        # :en Initialize Pyxel
-        pyxel.init(self.WIDTH, self.HEIGHT, title="SpriteDefiner Ver.2", quit_key=pyxel.KEY_Q, display_scale=2)
-
-        pyxel.load("my_resource.pyxres")  # 空のリソースファイルをロードしておく
-
+        # :jp Pyxelを初期化（ヘッドレスモードではウィンドウを作らず、オフスクリーン画像に描画する）
+        # :en Initialize Pyxel (headless mode creates no window and draws into an offscreen image)
+        self.headless = headless
+        if headless:
+            self.gfx = pyxel.Image(self.WIDTH, self.HEIGHT)
+        else:
+            pyxel.init(self.WIDTH, self.HEIGHT, title="SpriteDefiner Ver.2", quit_key=pyxel.KEY_NONE, display_scale=2)
+            self.gfx = pyxel
 
-        # :jp DialogManagerを初期化
-        # :en Initialize DialogManager
-        dialogs_json_path = os.path.join(os.path.dirname(__file__), 'SpriteDefinerDlg', 'dialogs.json')
-        self.dialog_manager = DialogManager(dialogs_json_path)
+        # :jp 入力元（通常 / 記録 / 再生）
+        # :en Input source (live / recording / replay)
+        if replay_input is not None:
+            self.input = replay_input
+        elif record_file:
+            self.input = RecordingInput(record_file, self.WIDTH, self.HEIGHT)
+        else:
+            self.input = LiveInput()
+        # :jp Qキー以外での終了（ウィンドウを閉じる等）でも記録ファイルを閉じる
+        # :en Close the recording on other exits too (e.g. closing the window)
+        atexit.register(self.input.close)
 
-        # :jp FileOpenDialogControllerを初期化
-        # :en Initialize FileOpenDialogController
-        self.file_open_controller = FileOpenDialogController(self.dialog_manager, ".")
-        
-        # :jp SpriteEditDialogControllerを初期化
-        # :en Initialize SpriteEditDialogController
-        self.sprite_edit_controller = SpriteEditDialogController(self.dialog_manager)
+        # :jp ダイアログ関連は初回使用時（F1または右クリック）に初期化する
+        # :en The dialog subsystem is initialized on first use (F1 or right click)
+        self.dialog_manager = None
+        self.file_open_controller = None
+        self.sprite_edit_controller = None
+        # :jp コントローラー生成前に決まったフィールドマッピング
+        # :en Field mappings decided before the controller exists
+        self.sprite_field_mappings = None
 
         # :jp 読み込まれたリソースファイル情報
         # :en Loaded resource file information
         self.loaded_pyxres_file = None
         self.resource_loaded = False
 
+        # :jp 開いているプロジェクト（TABで切り替え）と読み込み済みデータのLRUキャッシュ
+        # :en Open projects (switched with TAB) and the LRU cache of loaded data
+        self.open_projects = []
+        self.project_cache = ProjectCache(cache_mb)
+
         # :jp スプライト表示設定
         # :en Sprite display settings
         self.display_x = 8
         self.display_y = 32
-        self.scroll_x = 0
-        self.scroll_y = 0
+        # :jp 表示領域とスクロール位置（画面座標 <-> タイル座標の変換表を持つ）
+        # :en View area and scroll position (holds the screen <-> tile lookup tables)
+        self.viewport = Viewport(self.display_x, self.display_y, VIEW_WIDTH, VIEW_HEIGHT)
+        # :jp マウスが乗っているタイル（毎フレーム更新）
+        # :en Tile under the mouse (updated every frame)
+        self.hover_tile = None
         
         # :jp タイル選択状態
         # :en Tile selection state
         self.selected_tile_x = None  # リソースファイル座標系でのX座標
         self.selected_tile_y = None  # リソースファイル座標系でのY座標
         
+        # :jp タイルマップのタイル使用状況（H キーでヒートマップ表示）
+        # :en Tilemap tile usage (heatmap toggled with the H key)
+        self.tile_usage_counts = None
+        self.usage_overlay = None
+        self.show_usage_heatmap = False
+        
+        # :jp ミニマップ（M キーで表示）。縮小画像はバンクの画素が変わった時だけ作り直す
+        # :en Minimap (toggled with the M key); the downsampled image is rebuilt only when bank pixels change
+        self.show_minimap = False
+        self.minimap_image = None
+        self.minimap_digest = None
+        self.minimap_density = None
+        
+        # :jp パレット差し替えプレビュー（P キーで表示）。変換済みのタイル画像はLRUでキャッシュ
+        # :en Palette-swap preview (toggled with the P key); recolored tiles are cached in LRU order
+        self.show_palette_preview = False
+        self.palette_variants = PaletteVariantCache()
+        
+        # :jp タイルマッププレビュー（T キーで切り替え）。チャンク単位でオフスクリーンにキャッシュ
+        # :en Tilemap preview (toggled with the T key); rendered into offscreen chunks
+        self.show_tilemap = False
+        self.tilemap_index = 0
+        # :jp タイルマップ用の表示領域（スプライトシートと同じ変換表で当たり判定・描画位置を求める）
+        # :en View for the tilemap (hit tests and draw positions use the same lookup tables as the sprite sheet)
+        self.map_viewport = Viewport(self.display_x, self.display_y, VIEW_WIDTH, VIEW_HEIGHT)
+        self.show_tilemap_names = False
+        self.tilemap_chunks = TilemapChunkCache()
+        self.tilemap_names = None
+        
+        # :jp 似ているタイルの検索（S キーで切り替え）。全タイルの特徴ベクトルをメモリ上に保持
+        # :en Similar tile search (toggled with the S key); feature vectors of every tile are kept in memory
+        self.show_similar = False
+        self.similarity_index = TileSimilarityIndex(colkey=TRANSPARENT_COLOR)
+        self.similar_tiles = []
+        self.similar_query = None
+        
+        # :jp 最近編集したスプライト（R キーでパネル表示, 1-6 キーでジャンプ）。meta.recent_edits に保存
+        # :en Recently edited sprites (R shows the panel, 1-6 jump); saved in meta.recent_edits
+        self.show_recent_edits = False
+        self.recent_edits = RecentEdits()
+        
         # :jp スプライト定義データ
         # :en Sprite definition data
         self.sprite_data = None
         self.sprite_json_file = None
+        # :jp スプライト定義の保存先（1ファイルJSON / シャード形式 / SQLite）
+        # :en Where sprite definitions are stored (single JSON / sharded / SQLite)
+        self.sprite_store = None
+        # :jp スプライトレコードが共有するフィールドスキーマ
+        # :en Field schema shared by the sprite records
+        self.sprite_schema = None
+        # :jp 編集操作の先行書き込みログと、起動時に見つかった未保存の編集
+        # :en Write-ahead log of edit operations, and unsaved edits found on load
+        self.sprite_wal = None
+        self.pending_recovery = None
+
+        # :jp 実行中のゲームへスプライトの変更を送るサーバー（--hot-reload-port 指定時のみ）
+        # :en Server pushing sprite changes to running games (only with --hot-reload-port)
+        self.hot_reload = None
+        if hot_reload_port:
+            try:
+                self.hot_reload = HotReloadServer(hot_reload_port)
+                print(f"Hot reload server listening on localhost:{self.hot_reload.port}")
+            except OSError as e:
+                print(f"Warning: could not start hot reload server: {e}")
+        # :jp スプライトデータの変更回数（ラベルキャッシュのキーに使用）
+        # :en Sprite data revision counter (used as label cache key)
+        self.sprite_data_version = 0
+
+        # :jp ステータス行のラベルキャッシュ
+        # :en Label cache for status lines
+        self.label_cache = LabelCache()
+
+        # :jp ダイアログの完了イベント（毎フレームのポーリングの代わり）
+        # :en Dialog completion events (instead of polling every frame)
+        self.dialog_events = DialogEventQueue()
+        self.dialog_events.subscribe("file_open", self.on_file_open_result)
+        self.dialog_events.subscribe("sprite_edit", self.on_sprite_edit_result)
+        self.dialog_events.subscribe("file_open", lambda result: self.input.event("file_open", result))
+        self.dialog_events.subscribe("sprite_edit", lambda result: self.input.event("sprite_edit", result))
 
         # :jp コマンドパレットを初期化
         # :en Initialize the command palette
         self.init_command_palette()
 
+        if headless:
+            return
+
         pyxel.mouse(True)
 
         # :jp アプリケーションを実行
         # :en Run the application
+        self.run_start = time.perf_counter()
         pyxel.run(self.update, self.draw)
 
+    @property
+    def scroll_x(self):
+        return self.viewport.scroll_x
+
+    @scroll_x.setter
+    def scroll_x(self, value):
+        self.viewport.scroll_to(value, self.viewport.scroll_y)
+
+    @property
+    def scroll_y(self):
+        return self.viewport.scroll_y
+
+    @scroll_y.setter
+    def scroll_y(self, value):
+        self.viewport.scroll_to(self.viewport.scroll_x, value)
+
+    def ensure_dialogs(self):
+        """
+        :jp ダイアログ関連（DialogManagerと各コントローラー）を必要になった時に初期化します
+        :en Initialize the dialog subsystem (DialogManager and controllers) on first use
+        """
+        if self.dialog_manager is not None:
+            return
+
+        start = time.perf_counter()
+
+        from dialog_manager import DialogManager
+        from file_open_dialog import FileOpenDialogController
+        from sprite_edit_dialog import SpriteEditDialogController
+
+        # :jp DialogManagerを初期化
+        # :en Initialize DialogManager
+        dialogs_json_path = os.path.join(os.path.dirname(__file__), 'SpriteDefinerDlg', 'dialogs.json')
+        self.dialog_manager = DialogManager(dialogs_json_path)
+
+        # :jp FileOpenDialogControllerを初期化
+        # :en Initialize FileOpenDialogController
+        self.file_open_controller = FileOpenDialogController(self.dialog_manager, ".")
+        
+        # :jp SpriteEditDialogControllerを初期化
+        # :en Initialize SpriteEditDialogController
+        self.sprite_edit_controller = SpriteEditDialogController(self.dialog_manager)
+        if self.sprite_field_mappings is not None:
+            self.sprite_edit_controller.field_mappings = self.sprite_field_mappings
+
+        self.dialog_events.attach("file_open", self.file_open_controller)
+        self.dialog_events.attach("sprite_edit", self.sprite_edit_controller)
+
+        if self.startup_timing:
+            print(f"[startup] dialogs: {(time.perf_counter() - start) * 1000:.1f} ms (deferred)")
+
+    def report_startup_timing(self):
+        """
+        :jp 起動時間（インポート/初期化/最初のフレーム）を出力します
+        :en Print startup timings (import / init / first frame)
+        """
+        now = time.perf_counter()
+        print(f"[startup] import: {(_IMPORT_END - _IMPORT_START) * 1000:.1f} ms")
+        print(f"[startup] init: {(self.run_start - self.init_start) * 1000:.1f} ms")
+        print(f"[startup] first frame: {(now - self.run_start) * 1000:.1f} ms")
+        print(f"[startup] total: {(now - _IMPORT_START) * 1000:.1f} ms")
+        self.startup_timing_reported = True
+
     def init_command_palette(self):
         """
         :jp コマンドパレットのボタンを定義します。
@@ -114,7 +346,13 @@ class SpriteDefiner:
         :jp LOADアクション（ファイルオープンダイアログ表示）
         :en LOAD action (shows the file open dialog)
         """
+        # :jp 再生時はダイアログを開かず、記録された結果を使う
+        # :en During replay no dialog is opened; the recorded result is used instead
+        if self.input.replaying:
+            return
+        self.ensure_dialogs()
         self.file_open_controller.show_file_open_dialog()
+        self.dialog_events.opened("file_open", self.file_open_controller)
     
     def action_toggle_viewport_size(self):
         """
@@ -125,18 +363,21 @@ class SpriteDefiner:
         self.scroll_x = 0
         self.scroll_y = 0
 
-    def check_file_open_result(self):
+    def process_dialog_events(self):
         """
-        :jp ファイルオープンダイアログの結果をチェックし、pyxresファイルを読み込みます
-        :en Check file open dialog result and load pyxres file
+        :jp 閉じたダイアログの完了イベントを発行し、ハンドラーに配送します
+        :en Publish completion events of closed dialogs and deliver them to handlers
         """
-        if not self.file_open_controller.is_active():
-            result = self.file_open_controller.get_result()
-            if result and result.endswith('.pyxres'):
-                self.load_pyxres_file(result)
-                # :jp 結果をクリアして重複処理を防ぐ
-                # :en Clear result to prevent duplicate processing
-                self.file_open_controller.result = None
+        self.dialog_events.poll()
+        self.dialog_events.dispatch()
+
+    def on_file_open_result(self, result):
+        """
+        :jp ファイルオープンダイアログの完了イベント。pyxresファイルを読み込みます
+        :en File open dialog completion event; loads the pyxres file
+        """
+        if result and result.endswith('.pyxres'):
+            self.load_pyxres_file(result)
 
     def load_pyxres_file(self, file_path):
         """
@@ -145,17 +386,45 @@ class SpriteDefiner:
         """
         try:
             if os.path.exists(file_path):
+                # :jp 現在のプロジェクトをキャッシュに退避
+                # :en Stash the current project in the cache
+                self.stash_current_project()
+                
+                json_file = os.path.splitext(file_path)[0] + '.json'
+                entry = self.project_cache.get(file_path, sprite_storage.storage_path(json_file))
+                if entry is not None:
+                    # :jp キャッシュ済み: pyxel.loadとJSON解析を省略して復元
+                    # :en Cached: restore without pyxel.load and JSON parsing
+                    self.restore_project(file_path, entry)
+                    print(f"Switched to cached project: {file_path}")
+                    return
+                
                 # :jp Pyxelにリソースファイルを読み込み
                 # :en Load resource file into Pyxel
-                pyxel.load(file_path)
+                if self.headless:
+                    pyxres_reader.load_resource(file_path)
+                else:
+                    pyxel.load(file_path)
                 
                 self.loaded_pyxres_file = file_path
                 self.resource_loaded = True
+                self.remember_project(file_path)
                 
                 # :jp 対応するJSONファイルを読み込み/作成
                 # :en Load/create corresponding JSON file
                 self.load_or_create_sprite_json(file_path)
                 
+                # :jp タイルマップが参照しているタイルを解析
+                # :en Analyze which tiles the tilemaps reference
+                self.analyze_tile_usage()
+                
+                # :jp 画像が変わったタイルの当たり判定データを更新して保存（読み取り専用モードと、
+                #     復旧確認中は保存しない: 保存すると未保存の編集ログが消えるため）
+                # :en Refresh collision data for tiles whose pixels changed, then save (not in read-only
+                #     mode, nor while the recovery prompt is up: saving would drop the unsaved edit log)
+                if self.update_collision_masks() and not self.read_only and not self.pending_recovery:
+                    self.save_sprite_json()
+                
                 print(f"Successfully loaded: {file_path}")
                 print("Resource file loaded. You can now view sprites in the image bank.")
             else:
@@ -165,68 +434,263 @@ class SpriteDefiner:
             print(f"Error loading pyxres file: {e}")
             self.resource_loaded = False
 
+    def remember_project(self, file_path):
+        """
+        :jp 開いているプロジェクトの一覧に追加します
+        :en Add to the list of open projects
+        """
+        path = os.path.abspath(file_path)
+        if path not in self.open_projects:
+            self.open_projects.append(path)
+
+    def stash_current_project(self):
+        """
+        :jp 現在のプロジェクトの画像データとスプライトモデルをキャッシュに保存します
+        :en Save the current project's bank pixels and sprite model in the cache
+        """
+        if not self.resource_loaded or not self.loaded_pyxres_file:
+            return
+        
+        self.project_cache.put(self.loaded_pyxres_file, sprite_storage.storage_path(self.sprite_json_file), {
+            'banks': capture_banks(),
+            'sprite_json_file': self.sprite_json_file,
+            'sprite_data': self.sprite_data,
+            'sprite_schema': self.sprite_schema,
+            'tile_usage_counts': self.tile_usage_counts,
+            'view': (self.scroll_x, self.scroll_y, self.selected_tile_x, self.selected_tile_y),
+        })
+
+    def restore_project(self, file_path, entry):
+        """
+        :jp キャッシュのエントリからプロジェクトの状態を復元します
+        :en Restore project state from a cache entry
+        """
+        restore_banks(entry['banks'])
+        self.loaded_pyxres_file = file_path
+        self.resource_loaded = True
+        self.remember_project(file_path)
+        self.sprite_json_file = entry['sprite_json_file']
+        self.sprite_store = sprite_storage.open_store(self.sprite_json_file)
+        self.open_sprite_wal()
+        self.sprite_data = entry['sprite_data']
+        self.sprite_schema = entry['sprite_schema']
+        self.tile_usage_counts = entry['tile_usage_counts']
+        self.usage_overlay = None
+        if self.tile_usage_counts is None:
+            self.show_usage_heatmap = False
+        self.scroll_x, self.scroll_y, self.selected_tile_x, self.selected_tile_y = entry['view']
+        self.sprite_data_version += 1
+        self.load_recent_edits()
+        self.update_dialog_fields_from_template()
+
+    def action_switch_project(self):
+        """
+        :jp 開いている次のプロジェクトに切り替えます
+        :en Switch to the next open project
+        """
+        if len(self.open_projects) < 2 or not self.loaded_pyxres_file:
+            return
+        
+        current = os.path.abspath(self.loaded_pyxres_file)
+        index = self.open_projects.index(current) if current in self.open_projects else -1
+        next_project = self.open_projects[(index + 1) % len(self.open_projects)]
+        self.load_pyxres_file(next_project)
+
     def update(self):
         """
         :jp アプリケーションの状態を更新します。
         :en Update the application state.
         """
+        # :jp 入力の記録（記録モード時）
+        # :en Record input (in recording mode)
+        self.input.begin_frame(bool(self.dialog_manager and self.dialog_manager.active_dialog))
+
+        # :jp ホットリロード: 前のフレームで送り切れなかった変更を送る（待たない）
+        # :en Hot reload: send changes left over from earlier frames (never waits)
+        if self.hot_reload is not None:
+            self.hot_reload.pump()
+
+        # :jp Qキーで終了（Pyxelのquit_keyはPythonの終了処理を通らないため、記録を閉じてから自分で終了する）
+        # :en Quit with Q (pyxel's quit_key bypasses Python's exit handlers, so close the recording
+        #     and quit here; the press itself is recorded, but a replay never quits)
+        if self.input.btnp(pyxel.KEY_Q) and not self.input.replaying:
+            self.input.close()
+            pyxel.quit()
+
         # :jp ダイアログが表示されているか確認
         # :en Check if a dialog is active
-        if self.dialog_manager.active_dialog:
+        if self.dialog_manager and self.dialog_manager.active_dialog:
             self.dialog_manager.update()
             self.file_open_controller.update()
             self.sprite_edit_controller.update()
             
-            # :jp スプライト編集ダイアログの結果をチェック
-            # :en Check sprite edit dialog result
-            self.check_sprite_edit_result()
+            # :jp 閉じたダイアログの結果を処理
+            # :en Handle results of dialogs that just closed
+            self.process_dialog_events()
             
             return # :jp ダイアログ表示中は他の処理をスキップ # :en Skip other processes while the dialog is displayed
 
-        # :jp ファイルオープンダイアログの結果をチェック
-        # :en Check file open dialog result
-        self.check_file_open_result()
+        # :jp 復旧確認中はY/N以外の入力を受け付けない
+        # :en Only accept Y/N while the recovery prompt is shown
+        if self.pending_recovery:
+            self.update_recovery_prompt()
+            return
+
+        # :jp 閉じたダイアログの結果を処理
+        # :en Handle results of dialogs that just closed
+        self.process_dialog_events()
 
         # :jp コマンドパレットの更新
         # :en Update the command palette
         self.update_command_palette()
         
-        # :jp タイルクリック処理
-        # :en Handle tile clicks
-        self.handle_tile_click()
+        # :jp タイルマッププレビュー中はタイルマップ用の操作（スクロール・クリック）
+        # :en In the tilemap preview, input goes to the tilemap view (scrolling / clicks)
+        if self.show_tilemap:
+            self.update_tilemap_view()
+        else:
+            self.update_sprite_sheet_view()
+
+        # :jp キーボードショートカット
+        # :en Keyboard shortcuts
+        if self.input.btnp(pyxel.KEY_F1):
+            self.action_load()
+        if self.input.btnp(pyxel.KEY_F2):
+            self.action_toggle_viewport_size()
+        if self.input.btnp(pyxel.KEY_TAB):
+            self.action_switch_project()
+        if self.input.btnp(pyxel.KEY_H) and self.tile_usage_counts is not None:
+            self.show_usage_heatmap = not self.show_usage_heatmap
+        if self.input.btnp(pyxel.KEY_M) and self.resource_loaded and bank_analysis.available():
+            self.show_minimap = not self.show_minimap
+        if self.input.btnp(pyxel.KEY_P) and self.resource_loaded and bank_analysis.available():
+            self.show_palette_preview = not self.show_palette_preview
+        if self.input.btnp(pyxel.KEY_T) and self.resource_loaded and bank_analysis.available():
+            self.show_tilemap = not self.show_tilemap
+        if self.input.btnp(pyxel.KEY_S) and self.resource_loaded and bank_analysis.available():
+            self.show_similar = not self.show_similar
+            self.similar_query = None
+        if self.input.btnp(pyxel.KEY_R) and self.resource_loaded:
+            self.show_recent_edits = not self.show_recent_edits
+
+    def update_sprite_sheet_view(self):
+        """
+        :jp スプライトシート表示中のクリックとスクロールを処理します
+        :en Handle clicks and scrolling while the sprite sheet is shown
+        """
+        # :jp ミニマップのクリック（スプライトシートより手前にあるので先に処理）
+        # :en Minimap clicks (handled first since it sits above the sprite sheet)
+        if not self.handle_minimap_click():
+            # :jp タイルクリック処理
+            # :en Handle tile clicks
+            self.handle_tile_click()
         
         # :jp 右クリック処理（スプライト編集）
         # :en Handle right click (sprite editing)
         self.handle_sprite_edit_request()
 
-        # キー入力でスクロール操作（8ピクセル単位）
-        if pyxel.btnp(pyxel.KEY_LEFT):
-            self.scroll_x = max(0, self.scroll_x - 8)
-        if pyxel.btnp(pyxel.KEY_RIGHT):
-            self.scroll_x = min(16, self.scroll_x + 8)  # 最大スクロール範囲（256 - 240 = 16）
-        if pyxel.btnp(pyxel.KEY_UP):
-            self.scroll_y = max(0, self.scroll_y - 8)
-        if pyxel.btnp(pyxel.KEY_DOWN):
-            self.scroll_y = min(56, self.scroll_y + 8)  # 最大スクロール範囲（256 - 200 = 56）
+        # :jp 選択が変わったら似ているタイルを検索し直す
+        # :en Search for similar tiles again when the selection changes
+        if self.show_similar:
+            self.update_similar_tiles()
 
-        # :jp キーボードショートカット
-        # :en Keyboard shortcuts
-        if pyxel.btnp(pyxel.KEY_F1):
-            self.action_load()
-        if pyxel.btnp(pyxel.KEY_F2):
-            self.action_toggle_viewport_size()
+        # :jp 1-6 キーで最近編集したスプライトへジャンプ
+        # :en Keys 1-6 jump to recently edited sprites
+        for index, key in enumerate(RECENT_EDIT_KEYS):
+            if self.input.btnp(key):
+                self.jump_to_recent_edit(index)
+
+        # キー入力でスクロール操作（8ピクセル単位, 範囲はビューポートが制限）
+        if self.input.btnp(pyxel.KEY_LEFT):
+            self.scroll_x -= 8
+        if self.input.btnp(pyxel.KEY_RIGHT):
+            self.scroll_x += 8
+        if self.input.btnp(pyxel.KEY_UP):
+            self.scroll_y -= 8
+        if self.input.btnp(pyxel.KEY_DOWN):
+            self.scroll_y += 8
+
+        # :jp マウスが乗っているタイル（変換表を引くだけなので毎フレーム更新できる）
+        # :en Tile under the mouse (just a table lookup, so it is refreshed every frame)
+        self.hover_tile = self.viewport.tile_at(self.input.mouse_x, self.input.mouse_y) if self.resource_loaded else None
+
+    def update_tilemap_view(self):
+        """
+        :jp タイルマッププレビューの操作: 矢印キーでスクロール、PageUp/PageDownでタイルマップ切り替え、
+            Nで名前表示、クリックでそのセルのタイルを選択
+        :en Tilemap preview input: arrows scroll, PageUp/PageDown switch tilemaps,
+            N toggles names, clicking a cell selects its source tile
+        """
+        viewport = self.sync_map_viewport()
+        step = 32
+        if self.input.btnp(pyxel.KEY_LEFT):
+            viewport.scroll_to(viewport.scroll_x - step, viewport.scroll_y)
+        if self.input.btnp(pyxel.KEY_RIGHT):
+            viewport.scroll_to(viewport.scroll_x + step, viewport.scroll_y)
+        if self.input.btnp(pyxel.KEY_UP):
+            viewport.scroll_to(viewport.scroll_x, viewport.scroll_y - step)
+        if self.input.btnp(pyxel.KEY_DOWN):
+            viewport.scroll_to(viewport.scroll_x, viewport.scroll_y + step)
+        if self.input.btnp(pyxel.KEY_PAGEDOWN):
+            self.tilemap_index = (self.tilemap_index + 1) % len(pyxel.tilemaps)
+            self.sync_map_viewport().scroll_to(0, 0)
+        if self.input.btnp(pyxel.KEY_PAGEUP):
+            self.tilemap_index = (self.tilemap_index - 1) % len(pyxel.tilemaps)
+            self.sync_map_viewport().scroll_to(0, 0)
+        if self.input.btnp(pyxel.KEY_N):
+            self.show_tilemap_names = not self.show_tilemap_names
+        
+        if self.input.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            cell = self.tilemap_cell_at(self.input.mouse_x, self.input.mouse_y)
+            if cell is not None:
+                size = viewport.tile_size
+                tile_x, tile_y = self.tilemap_tile(*cell)
+                self.selected_tile_x, self.selected_tile_y = tile_x * size, tile_y * size
+                print(f"Tilemap cell {cell} uses tile ({tile_x * size}, {tile_y * size})")
+
+    def sync_map_viewport(self):
+        """
+        :jp タイルマップ用の表示領域の大きさを現在のタイルマップに合わせて返します（変わった時だけ変換表を作り直す）
+        :en Fit the tilemap view to the current tilemap and return it (the tables are rebuilt only on change)
+        """
+        tilemap = pyxel.tilemaps[self.tilemap_index]
+        size = self.map_viewport.tile_size
+        self.map_viewport.set_bank_size(tilemap.width * size, tilemap.height * size)
+        return self.map_viewport
+
+    def tilemap_cell_at(self, screen_x, screen_y):
+        """
+        :jp 画面座標にあるタイルマップのセル (列, 行) を返します（表示領域外・タイルマップの範囲外なら None）
+        :en Return the tilemap cell (col, row) at a screen position (None outside the view or the tilemap)
+        """
+        # :jp 変換表はタイルマップの範囲外（表示領域より小さいタイルマップの空白部分）を None にする
+        # :en The lookup tables map positions past the tilemap (the empty area of a small tilemap) to None
+        viewport = self.sync_map_viewport()
+        tile = viewport.tile_at(screen_x, screen_y)
+        if tile is None:
+            return None
+        return tile[0] // viewport.tile_size, tile[1] // viewport.tile_size
+
+    def tilemap_tile(self, col, row):
+        """
+        :jp タイルマップのセルが参照しているタイル座標 (tx, ty) を返します
+        :en Return the tile coords (tx, ty) a tilemap cell refers to
+        """
+        tiles = bank_analysis.tilemap_tiles(pyxel.tilemaps[self.tilemap_index])
+        tile_x, tile_y = tiles[row, col]
+        return int(tile_x), int(tile_y)
 
     def update_command_palette(self):
         """
         :jp コマンドパレットのマウスホバーとクリックを処理します。
         :en Process mouse hover and clicks for the command palette.
         """
-        mouse_x, mouse_y = pyxel.mouse_x, pyxel.mouse_y
+        mouse_x, mouse_y = self.input.mouse_x, self.input.mouse_y
         for button in self.command_buttons:
             x, y, w, h = button['rect']
             button['is_hover'] = x <= mouse_x < x + w and y <= mouse_y < y + h
             
-            if button['is_hover'] and pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            if button['is_hover'] and self.input.btnp(pyxel.MOUSE_BUTTON_LEFT):
                 button['action']()
 
     def draw(self):
@@ -236,11 +700,11 @@ class SpriteDefiner:
         """
         # :jp 画面を黒でクリアします
         # :en Clear the screen with black
-        pyxel.cls(pyxel.COLOR_BLACK)
+        self.gfx.cls(pyxel.COLOR_BLACK)
 
 
 
-        #pyxel.blt(16, 16, 0, 0, 0, 16, 16, 1, 10, 1)    
+        #self.gfx.blt(16, 16, 0, 0, 0, 16, 16, 1, 10, 1)    
     
 
             # self.x, self.y,
@@ -259,13 +723,31 @@ class SpriteDefiner:
         
         # :jp ダイアログがアクティブな場合はそれをオーバーレイ
         # :en If a dialog is active, draw it as overlay
-        if self.dialog_manager.active_dialog:
+        if self.dialog_manager and self.dialog_manager.active_dialog:
             self.dialog_manager.draw()
 
+        # :jp 復旧確認を最前面に表示
+        # :en Show the recovery prompt on top
+        if self.pending_recovery:
+            self.draw_recovery_prompt()
+
+        # :jp 起動時間計測モードでは最初のフレーム描画後に結果を出力
+        # :en In startup timing mode, report after the first frame is drawn
+        if self.startup_timing and not self.startup_timing_reported:
+            self.report_startup_timing()
+
 
 
         #blt(x, y, img, u, v, w, h, [colkey], [rotate], [scale])
 
+    def render_png(self, png_path, scale=1):
+        """
+        :jp ヘッドレスモードで1フレーム描画し、PNGファイルに書き出します
+        :en Draw one frame in headless mode and write it to a PNG file
+        """
+        self.draw()
+        self.gfx.save(png_path, scale)
+
     def draw_command_palette(self):
         """
         :jp コマンドパレットのボタンを描画します。
@@ -277,14 +759,14 @@ class SpriteDefiner:
             # :jp ボタンの背景と枠線を描画
             # :en Draw button background and border
             bg_color = pyxel.COLOR_DARK_BLUE if button['is_hover'] else pyxel.COLOR_NAVY
-            pyxel.rect(x, y, w, h, bg_color)
-            pyxel.rectb(x, y, w, h, pyxel.COLOR_WHITE)
+            self.gfx.rect(x, y, w, h, bg_color)
+            self.gfx.rectb(x, y, w, h, pyxel.COLOR_WHITE)
             
             # :jp ボタンのラベルを描画
             # :en Draw button label
             text_x = x + (w - len(button['label']) * pyxel.FONT_WIDTH) / 2
             text_y = y + (h - pyxel.FONT_HEIGHT) / 2
-            pyxel.text(int(text_x), int(text_y), button['label'], pyxel.COLOR_WHITE)
+            self.gfx.text(int(text_x), int(text_y), button['label'], pyxel.COLOR_WHITE)
 
     def draw_main_content(self):
         """
@@ -292,41 +774,57 @@ class SpriteDefiner:
         :en Draw main content
         """
         if self.resource_loaded:
-            # :jp リソースファイル情報をコマンドパレットの下に表示
-            # :en Display resource file info below command palette
-            selected_info = f"Tile: ({self.selected_tile_x},{self.selected_tile_y})" if self.selected_tile_x is not None else "Tile: None"
-            info_text = f"Loaded: {os.path.basename(self.loaded_pyxres_file)} | Scroll: ({self.scroll_x},{self.scroll_y}) | {selected_info}"
-            pyxel.text(5, 23, info_text, pyxel.COLOR_WHITE)
+            # :jp リソースファイル情報をコマンドパレットの下に表示（状態が変わった時のみ再構築）
+            # :en Display resource file info below command palette (rebuilt only when state changes)
+            info_text, _ = self.label_cache.get(
+                'info',
+                (self.loaded_pyxres_file, self.scroll_x, self.scroll_y, self.selected_tile_x, self.selected_tile_y),
+                self.build_info_text
+            )
+            self.gfx.text(5, 23, info_text, pyxel.COLOR_WHITE)
             
-            # :jp スプライトシート表示
-            # :en Display sprite sheet
-            self.draw_sprite_sheet()
+            # :jp スプライトシート表示（T キーでタイルマッププレビュー）
+            # :en Display sprite sheet (tilemap preview with the T key)
+            if self.show_tilemap:
+                self.draw_tilemap_view()
+            else:
+                self.draw_sprite_sheet()
             
         else:
             # :jp リソースファイルが読み込まれていない場合の表示
             # :en Display when no resource file is loaded
-            message = "Press F1/LOAD to open file | F2/RESET scroll"
-            x = (self.WIDTH - len(message) * pyxel.FONT_WIDTH) / 2
+            message, message_width = self.label_cache.get(
+                'no_resource', None, lambda: "Press F1/LOAD to open file | F2/RESET scroll"
+            )
+            x = (self.WIDTH - message_width) / 2
             y = (self.HEIGHT - pyxel.FONT_HEIGHT) / 2
-            pyxel.text(int(x), int(y), message, pyxel.COLOR_WHITE)
+            self.gfx.text(int(x), int(y), message, pyxel.COLOR_WHITE)
+
+    def build_info_text(self):
+        """
+        :jp リソースファイル情報の文字列を作成します
+        :en Build the resource file info text
+        """
+        selected_info = f"Tile: ({self.selected_tile_x},{self.selected_tile_y})" if self.selected_tile_x is not None else "Tile: None"
+        return f"Loaded: {os.path.basename(self.loaded_pyxres_file)} | Scroll: ({self.scroll_x},{self.scroll_y}) | {selected_info}"
 
     def draw_sprite_sheet(self):
         """
         :jp スプライトシートを等倍で描画
         :en Draw sprite sheet at 1x scale
         """
-        # 表示領域サイズ（ウィンドウサイズに合わせて調整）
-        display_width = 240  # 256 - 16 (余白)
-        display_height = 200 # 256 - 56 (上部コマンド領域)
+        # 表示領域サイズ（ビューポートに合わせる）
+        display_width = self.viewport.width
+        display_height = self.viewport.height
         
         # 背景領域
-        pyxel.rect(self.display_x, self.display_y, display_width, display_height, pyxel.COLOR_NAVY)
+        self.gfx.rect(self.display_x, self.display_y, display_width, display_height, pyxel.COLOR_NAVY)
         
         # 選択されたタイルをハイライト表示（スプライトより先に描画 = 奥に表示）
         self.draw_selected_tile_highlight()
         
         # スプライトシート描画（等倍）
-        pyxel.blt(
+        self.gfx.blt(
             self.display_x,          # x: 表示X位置
             self.display_y,          # y: 表示Y位置
             0,                       # img: 画像バンク0
@@ -334,14 +832,328 @@ class SpriteDefiner:
             self.scroll_y,           # v: 切り出し開始Y
             display_width,           # w: 切り出し幅
             display_height,          # h: 切り出し高さ
-            0                        # colkey: 透明色（黒を透明にしない）
+            TRANSPARENT_COLOR        # colkey: 透明色
         )
         
+        # タイル使用頻度ヒートマップ（グリッドの下）
+        if self.show_usage_heatmap:
+            self.draw_usage_heatmap()
+        
         # グリッド描画（最前面）
         self.draw_grid(display_width, display_height)
         
+        # マウスが乗っているタイルの枠（グリッドの上）
+        self.draw_hover_highlight()
+        
+        # 未使用/未定義タイルのマーカー（グリッドの上）
+        if self.show_usage_heatmap:
+            self.draw_usage_flags()
+        
+        # 似ているタイルの枠（グリッドの上）
+        if self.show_similar:
+            self.draw_similar_tiles()
+        
         # 選択されたスプライトのNAMEを表示
         self.draw_selected_sprite_name()
+        
+        # パレット差し替えプレビュー（スプライトシートの左下に重ねる）
+        if self.show_palette_preview:
+            self.draw_palette_preview(display_height)
+        
+        # ミニマップ（スプライトシートの右上に重ねる）
+        if self.show_minimap:
+            self.draw_minimap(display_width)
+        
+        # 最近編集したスプライト（スプライトシートの右下に重ねる）
+        if self.show_recent_edits:
+            self.draw_recent_edits()
+
+    def analyze_tile_usage(self):
+        """
+        :jp 読み込んだリソースの全タイルマップを走査し、イメージバンク0のタイル使用回数を集計します
+        :en Scan every tilemap in the loaded resource and count uses of each image bank 0 tile
+        """
+        self.tile_usage_counts = None
+        self.usage_overlay = None
+        if not bank_analysis.available():
+            return
+        
+        tilemaps = [bank_analysis.tilemap_tiles(tilemap) for tilemap in pyxel.tilemaps if tilemap.imgsrc == 0]
+        self.tile_usage_counts = bank_analysis.tile_usage(tilemaps)
+        
+        overlay = self.get_usage_overlay()
+        print(f"Tile usage: {len(overlay['heat'])} tiles referenced by tilemaps | "
+              f"defined but unused: {len(overlay['defined_unused'])} | "
+              f"used but undefined: {len(overlay['used_undefined'])}")
+
+    def get_usage_overlay(self):
+        """
+        :jp ヒートマップとマーカーの描画データを取得します（スプライト定義が変わった時のみ再計算）
+        :en Get heatmap and marker draw data (recomputed only when sprite definitions change)
+        """
+        if self.usage_overlay is not None and self.usage_overlay['version'] == self.sprite_data_version:
+            return self.usage_overlay
+        
+        sprites = self.sprite_data["sprites"] if self.sprite_data else {}
+        defined_unused, used_undefined = bank_analysis.usage_flags(self.tile_usage_counts, sprites)
+        self.usage_overlay = {
+            'version': self.sprite_data_version,
+            'heat': bank_analysis.usage_heat(self.tile_usage_counts, levels=len(USAGE_HEAT_COLORS)),
+            'defined_unused': defined_unused,
+            'used_undefined': used_undefined,
+        }
+        return self.usage_overlay
+
+    def draw_usage_heatmap(self):
+        """
+        :jp タイルの使用頻度を半透明の色で重ねて描画します
+        :en Draw tile usage frequency as a semi-transparent color overlay
+        """
+        self.gfx.dither(0.5)
+        for tile_x, tile_y, level in self.get_usage_overlay()['heat']:
+            position = self.viewport.tile_screen(tile_x, tile_y)
+            if position:
+                self.gfx.rect(position[0], position[1], 8, 8, USAGE_HEAT_COLORS[level])
+        self.gfx.dither(1.0)
+
+    def draw_usage_flags(self):
+        """
+        :jp 定義済み未使用タイル（ピンク）と使用中未定義タイル（オレンジ）に印を付けます
+        :en Mark defined-but-unused tiles (pink) and used-but-undefined tiles (orange)
+        """
+        overlay = self.get_usage_overlay()
+        for tiles, color in ((overlay['defined_unused'], DEFINED_UNUSED_COLOR),
+                             (overlay['used_undefined'], USED_UNDEFINED_COLOR)):
+            for tile_x, tile_y in tiles:
+                position = self.viewport.tile_screen(tile_x, tile_y)
+                if position:
+                    self.gfx.rect(position[0] + 1, position[1] + 1, 3, 3, color)
+
+    def update_similar_tiles(self):
+        """
+        :jp 選択中のタイルに似ているタイルを検索します（選択かリソースが変わった時だけ）
+        :en Search for tiles similar to the selected tile (only when the selection or resource changes)
+        """
+        query = (self.loaded_pyxres_file, self.selected_tile_x, self.selected_tile_y)
+        if query == self.similar_query:
+            return
+        self.similar_query = query
+        self.similar_tiles = []
+        if self.selected_tile_x is None or self.selected_tile_y is None:
+            return
+
+        start = time.perf_counter()
+        self.similarity_index.sync(bank_analysis.bank_pixels(pyxel.images[0]))
+        self.similar_tiles = self.similarity_index.query(self.selected_tile_x, self.selected_tile_y, SIMILAR_TOP_K)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        summary = []
+        for tile_x, tile_y, distance in self.similar_tiles:
+            sprite = self.get_sprite_at_position(tile_x, tile_y)
+            name = sprite.get("NAME", "") if sprite else ""
+            summary.append(f"({tile_x},{tile_y}){' ' + name if name else ''} {distance:.3f}")
+        print(f"Similar to ({self.selected_tile_x},{self.selected_tile_y}) [{elapsed:.2f} ms]: " + ", ".join(summary))
+
+    def draw_similar_tiles(self):
+        """
+        :jp 似ているタイルを枠で囲みます
+        :en Outline the similar tiles
+        """
+        for tile_x, tile_y, _ in self.similar_tiles:
+            position = self.viewport.tile_screen(tile_x, tile_y)
+            if position:
+                self.gfx.rectb(position[0], position[1], 8, 8, SIMILAR_TILE_COLOR)
+
+    def minimap_rect(self, display_width=VIEW_WIDTH):
+        """
+        :jp ミニマップの表示位置とサイズ (x, y, w, h) を返します（スプライトシートの右上）
+        :en Return the minimap position and size (x, y, w, h) (top-right of the sprite sheet)
+        """
+        width = pyxel.images[0].width // MINIMAP_SCALE
+        height = pyxel.images[0].height // MINIMAP_SCALE
+        return (self.display_x + display_width - width - 2, self.display_y + 2, width, height)
+
+    def update_minimap(self):
+        """
+        :jp イメージバンクの画素が変わっていればミニマップ画像を作り直し、スプライト密度を更新します
+        :en Rebuild the minimap image if the bank pixels changed, and refresh the sprite density
+        """
+        pixels = bank_analysis.bank_pixels(pyxel.images[0])
+        digest = bank_analysis.bank_digest(pixels)
+        if digest != self.minimap_digest:
+            small = bank_analysis.downsample_mode(pixels, MINIMAP_SCALE, TRANSPARENT_COLOR)
+            if self.minimap_image is None or (self.minimap_image.height, self.minimap_image.width) != small.shape:
+                self.minimap_image = pyxel.Image(small.shape[1], small.shape[0])
+            bank_analysis.bank_pixels(self.minimap_image)[:] = small
+            self.minimap_digest = digest
+        
+        if self.minimap_density is None or self.minimap_density['version'] != self.sprite_data_version:
+            sprites = self.sprite_data["sprites"] if self.sprite_data else {}
+            counts = bank_analysis.sprite_density(sprites, pixels.shape[1], MINIMAP_DENSITY_BLOCK)
+            self.minimap_density = {
+                'version': self.sprite_data_version,
+                'heat': bank_analysis.usage_heat(counts, MINIMAP_DENSITY_BLOCK // MINIMAP_SCALE, len(USAGE_HEAT_COLORS)),
+            }
+
+    def draw_minimap(self, display_width):
+        """
+        :jp 縮小したバンク、定義済みスプライトの密度、現在の表示範囲を描画します
+        :en Draw the downsampled bank, defined sprite density and the current view rectangle
+        """
+        self.update_minimap()
+        x, y, width, height = self.minimap_rect(display_width)
+        
+        self.gfx.rect(x - 1, y - 1, width + 2, height + 2, pyxel.COLOR_BLACK)
+        self.gfx.blt(x, y, self.minimap_image, 0, 0, width, height)
+        
+        # 密度（半透明）
+        cell = MINIMAP_DENSITY_BLOCK // MINIMAP_SCALE
+        self.gfx.dither(0.5)
+        for cell_x, cell_y, level in self.minimap_density['heat']:
+            self.gfx.rect(x + cell_x, y + cell_y, cell, cell, USAGE_HEAT_COLORS[level])
+        self.gfx.dither(1.0)
+        
+        # 現在の表示範囲
+        self.gfx.rectb(x + self.scroll_x // MINIMAP_SCALE, y + self.scroll_y // MINIMAP_SCALE,
+                    display_width // MINIMAP_SCALE, self.viewport.height // MINIMAP_SCALE, pyxel.COLOR_WHITE)
+        self.gfx.rectb(x - 1, y - 1, width + 2, height + 2, pyxel.COLOR_GRAY)
+
+    def handle_minimap_click(self):
+        """
+        :jp ミニマップのクリック位置が表示の中心になるようにスクロールします（処理した場合 True）
+        :en Scroll so the clicked minimap position becomes the view center (True if handled)
+        """
+        if not self.show_minimap or not self.resource_loaded or not self.input.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            return False
+        
+        x, y, width, height = self.minimap_rect()
+        if not (x <= self.input.mouse_x < x + width and y <= self.input.mouse_y < y + height):
+            return False
+        
+        # クリック位置をバンク座標に戻し、表示の中心に来るよう8ピクセル単位で合わせる
+        bank_x = (self.input.mouse_x - x) * MINIMAP_SCALE
+        bank_y = (self.input.mouse_y - y) * MINIMAP_SCALE
+        self.scroll_x = (bank_x - self.viewport.width // 2) // 8 * 8
+        self.scroll_y = (bank_y - self.viewport.height // 2) // 8 * 8
+        return True
+
+    def get_tilemap_names(self):
+        """
+        :jp タイル座標 -> NAME の表を取得します（スプライト定義が変わった時のみ再作成）
+        :en Get the tile coords -> NAME table (rebuilt only when sprite definitions change)
+        """
+        if self.tilemap_names is None or self.tilemap_names['version'] != self.sprite_data_version:
+            sprites = self.sprite_data["sprites"] if self.sprite_data else {}
+            self.tilemap_names = {'version': self.sprite_data_version, 'names': tile_names(sprites)}
+        return self.tilemap_names['names']
+
+    def draw_tilemap_view(self):
+        """
+        :jp タイルマップを表示領域に描画します。表示範囲に入るチャンクだけをキャッシュから描画し、
+            タイルが変わったチャンクだけを描き直します
+        :en Draw the tilemap into the view. Only chunks inside the view are drawn from the cache,
+            and only chunks whose tiles changed are re-rendered
+        """
+        viewport = self.sync_map_viewport()
+        display_width = viewport.width
+        display_height = viewport.height
+        size = viewport.tile_size
+        tilemap = pyxel.tilemaps[self.tilemap_index]
+        image_index = tilemap.imgsrc if isinstance(tilemap.imgsrc, int) else 0
+        tiles = bank_analysis.tilemap_tiles(tilemap)
+        pixels = bank_analysis.bank_pixels(pyxel.images[image_index])
+        self.tilemap_chunks.sync(pixels)
+        
+        self.gfx.rect(self.display_x, self.display_y, display_width, display_height, pyxel.COLOR_BLACK)
+        self.gfx.clip(self.display_x, self.display_y, display_width, display_height)
+        
+        # 表示範囲に入るチャンクだけを描画
+        chunk_size = CHUNK_TILES * size
+        chunk_cols = (tilemap.width + CHUNK_TILES - 1) // CHUNK_TILES
+        chunk_rows = (tilemap.height + CHUNK_TILES - 1) // CHUNK_TILES
+        first_col, first_row = viewport.scroll_x // chunk_size, viewport.scroll_y // chunk_size
+        last_col = min(chunk_cols - 1, (viewport.scroll_x + display_width - 1) // chunk_size)
+        last_row = min(chunk_rows - 1, (viewport.scroll_y + display_height - 1) // chunk_size)
+        for chunk_y in range(first_row, last_row + 1):
+            for chunk_x in range(first_col, last_col + 1):
+                image = self.tilemap_chunks.chunk(self.tilemap_index, tiles, pixels, chunk_x, chunk_y, size)
+                screen_x, screen_y = viewport.to_screen(chunk_x * chunk_size, chunk_y * chunk_size)
+                self.gfx.blt(screen_x, screen_y, image, 0, 0, chunk_size, chunk_size)
+        
+        # スプライト定義のNAME（先頭1文字）をセルに重ねる（セルの画面座標は変換表から引く）
+        names = self.get_tilemap_names()
+        if self.show_tilemap_names and names:
+            first_x, first_y = viewport.scroll_x // size, viewport.scroll_y // size
+            visible = tiles[first_y:first_y + display_height // size + 1, first_x:first_x + display_width // size + 1].tolist()
+            for row, cells in enumerate(visible):
+                for col, (tile_x, tile_y) in enumerate(cells):
+                    name = names.get((tile_x, tile_y))
+                    if not name:
+                        continue
+                    position = viewport.tile_screen((first_x + col) * size, (first_y + row) * size)
+                    if position is not None:
+                        self.gfx.text(position[0] + 2, position[1] + 1, name[0], pyxel.COLOR_WHITE)
+        
+        self.gfx.clip()
+        self.gfx.rectb(self.display_x - 1, self.display_y - 1, display_width + 2, display_height + 2, pyxel.COLOR_GRAY)
+        
+        # マウス位置のセル・タイル・NAMEを表示
+        cell = self.tilemap_cell_at(self.input.mouse_x, self.input.mouse_y)
+        if cell is not None:
+            tile = self.tilemap_tile(*cell)
+            state = (self.tilemap_index, cell, tile, names.get(tile, ""))
+        else:
+            state = (self.tilemap_index, None, None, "")
+        label, _ = self.label_cache.get('tilemap', state, lambda: self.build_tilemap_label(*state))
+        self.gfx.text(self.display_x, self.display_y + display_height + 5, label, pyxel.COLOR_WHITE)
+
+    def build_tilemap_label(self, map_index, cell, tile, name):
+        """
+        :jp タイルマッププレビューの状態行を作成します
+        :en Build the status line of the tilemap preview
+        """
+        label = f"Tilemap {map_index} [PgUp/PgDn] N:names"
+        if cell is not None:
+            size = self.map_viewport.tile_size
+            label += f" | Cell {cell} Tile ({tile[0] * size},{tile[1] * size})"
+            if name:
+                label += f" {name}"
+        return label
+
+    def draw_palette_preview(self, display_height):
+        """
+        :jp 選択中のタイルを、元の色と各パレットで2倍に拡大して並べて描画します
+        :en Draw the selected tile at 2x in its original colors and under each palette, side by side
+        """
+        if self.selected_tile_x is None or self.selected_tile_y is None:
+            return
+        
+        palettes = self.sprite_data.get("meta", {}).get("palettes") if self.sprite_data else None
+        sprite = self.get_sprite_at_position(self.selected_tile_x, self.selected_tile_y)
+        variants = sprite_palettes(sprite, palettes if isinstance(palettes, dict) else {})
+        
+        pixels = bank_analysis.bank_pixels(pyxel.images[0])
+        self.palette_variants.sync(pixels)
+        
+        # 1枠 = 16x16の拡大画像 + 名前（先頭3文字）
+        cell = 20
+        count = min(len(variants), (VIEW_WIDTH - 8) // cell - 1)
+        x = self.display_x + 2
+        y = self.display_y + display_height - cell - 10
+        width = (count + 1) * cell + 2 if variants else 200
+        self.gfx.rect(x - 1, y - 1, width, cell + 10, pyxel.COLOR_BLACK)
+        self.gfx.rectb(x - 1, y - 1, width, cell + 10, pyxel.COLOR_GRAY)
+        
+        # pyxelの拡大描画は中心基準なので、8x8の左上を (+4, +4) ずらす
+        self.gfx.blt(x + 6, y + 6, 0, self.selected_tile_x, self.selected_tile_y, 8, 8, TRANSPARENT_COLOR, 0, 2)
+        self.gfx.text(x + 2, y + cell + 1, "ORG", pyxel.COLOR_WHITE)
+        for i, (name, lut) in enumerate(variants[:count]):
+            image = self.palette_variants.get(pixels, self.selected_tile_x, self.selected_tile_y, lut)
+            cell_x = x + (i + 1) * cell
+            self.gfx.blt(cell_x + 6, y + 6, image, 0, 0, 8, 8, TRANSPARENT_COLOR, 0, 2)
+            self.gfx.text(cell_x + 2, y + cell + 1, name[:3], pyxel.COLOR_WHITE)
+        if not variants:
+            self.gfx.text(x + cell + 2, y + 8, "No palettes (meta.palettes / PAL* fields)", pyxel.COLOR_GRAY)
 
     def draw_grid(self, display_width, display_height):
         """
@@ -357,7 +1169,7 @@ class SpriteDefiner:
             line_x = self.display_x + x - offset_x
             
             if self.display_x <= line_x <= self.display_x + display_width:
-                pyxel.line(
+                self.gfx.line(
                     line_x, self.display_y,
                     line_x, self.display_y + display_height,
                     pyxel.COLOR_WHITE
@@ -370,7 +1182,7 @@ class SpriteDefiner:
             line_y = self.display_y + y - offset_y
             
             if self.display_y <= line_y <= self.display_y + display_height:
-                pyxel.line(
+                self.gfx.line(
                     self.display_x, line_y,
                     self.display_x + display_width, line_y,
                     pyxel.COLOR_WHITE
@@ -384,32 +1196,14 @@ class SpriteDefiner:
         if not self.resource_loaded:
             return
             
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            mouse_x, mouse_y = pyxel.mouse_x, pyxel.mouse_y
-            
-            # 表示領域内かチェック
-            display_width = 240
-            display_height = 200
-            if (self.display_x <= mouse_x < self.display_x + display_width and
-                self.display_y <= mouse_y < self.display_y + display_height):
-                
-                # マウス座標をリソースファイル座標系に変換
-                relative_x = mouse_x - self.display_x
-                relative_y = mouse_y - self.display_y
-                
-                # リソースファイル上の座標を計算
-                resource_x = self.scroll_x + relative_x
-                resource_y = self.scroll_y + relative_y
-                
-                # 8ピクセル単位のタイル座標に変換
-                tile_x = (resource_x // 8) * 8
-                tile_y = (resource_y // 8) * 8
-                
+        if self.input.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            # マウス座標をリソースファイル上のタイル座標に変換（表示領域外なら None）
+            tile = self.viewport.tile_at(self.input.mouse_x, self.input.mouse_y)
+            if tile is not None:
                 # 選択状態を更新
-                self.selected_tile_x = tile_x
-                self.selected_tile_y = tile_y
+                self.selected_tile_x, self.selected_tile_y = tile
                 
-                print(f"Tile selected: ({tile_x}, {tile_y})")
+                print(f"Tile selected: ({tile[0]}, {tile[1]})")
 
     def draw_selected_tile_highlight(self):
         """
@@ -419,18 +1213,22 @@ class SpriteDefiner:
         if self.selected_tile_x is None or self.selected_tile_y is None:
             return
         
-        # リソース座標系から画面座標系に変換
-        screen_x = self.display_x + (self.selected_tile_x - self.scroll_x)
-        screen_y = self.display_y + (self.selected_tile_y - self.scroll_y)
-        
-        # 表示領域内かチェック
-        display_width = 240
-        display_height = 200
-        if (screen_x >= self.display_x and screen_x < self.display_x + display_width - 8 and
-            screen_y >= self.display_y and screen_y < self.display_y + display_height - 8):
-            
+        # リソース座標系から画面座標系に変換（表示領域に収まらなければ None）
+        position = self.viewport.tile_screen(self.selected_tile_x, self.selected_tile_y)
+        if position:
             # YELLOWで8x8のハイライト枠を描画（グリッド線上に表示）
-            pyxel.rectb(screen_x - 1, screen_y - 1, 8 + 3, 8 + 3, pyxel.COLOR_YELLOW)
+            self.gfx.rectb(position[0] - 1, position[1] - 1, 8 + 3, 8 + 3, pyxel.COLOR_YELLOW)
+
+    def draw_hover_highlight(self):
+        """
+        :jp マウスが乗っているタイルを枠で示します（選択中のタイルは除く）
+        :en Outline the tile under the mouse (except the selected tile)
+        """
+        if self.hover_tile is None or self.hover_tile == (self.selected_tile_x, self.selected_tile_y):
+            return
+        position = self.viewport.tile_screen(*self.hover_tile)
+        if position:
+            self.gfx.rectb(position[0], position[1], 8 + 1, 8 + 1, HOVER_TILE_COLOR)
 
     def load_or_create_sprite_json(self, pyxres_file):
         """
@@ -440,13 +1238,21 @@ class SpriteDefiner:
         # JSONファイル名を生成（拡張子を .pyxres から .json に変更）
         json_file = os.path.splitext(pyxres_file)[0] + '.json'
         self.sprite_json_file = json_file
+        self.sprite_data_version += 1
+        
+        # 保存先を選択（SQLite / シャード形式 があればそちらを使う）
+        self.sprite_store = sprite_storage.open_store(json_file)
+        self.open_sprite_wal()
         
         try:
-            if os.path.exists(json_file):
-                # 既存のJSONファイルを読み込み
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    self.sprite_data = json.load(f)
-                print(f"Loaded existing sprite definitions: {json_file}")
+            if self.sprite_store.exists():
+                # 既存のスプライト定義を読み込み（シャード形式・SQLiteは内容を表示時に読み込む）
+                self.sprite_data = self.sprite_store.load()
+                self.convert_sprite_records()
+                print(f"Loaded existing sprite definitions: {self.sprite_store.path} ({self.sprite_store.kind})")
+                
+                # 前回のクラッシュで保存されなかった編集がないか確認
+                self.check_pending_recovery()
                 
                 # _primary_ からフィールド定義を取得してダイアログコントローラーに設定
                 self.update_dialog_fields_from_template()
@@ -454,8 +1260,12 @@ class SpriteDefiner:
             else:
                 # JSONファイルが存在しない場合のみ、_template.jsonから作成
                 self.sprite_data = self.create_initial_sprite_json(pyxres_file)
-                self.save_sprite_json()
-                print(f"Created new sprite definitions from template: {json_file}")
+                self.convert_sprite_records()
+                if self.read_only:
+                    print(f"Using template sprite definitions (read-only, not written): {json_file}")
+                else:
+                    self.save_sprite_json()
+                    print(f"Created new sprite definitions from template: {json_file}")
                 
                 # _primary_ からフィールド定義を取得してダイアログコントローラーに設定
                 self.update_dialog_fields_from_template()
@@ -464,7 +1274,38 @@ class SpriteDefiner:
             print(f"Error loading/creating sprite JSON: {e}")
             # エラー時は初期化状態で作成
             self.sprite_data = self.create_initial_sprite_json(pyxres_file)
+            self.convert_sprite_records()
             self.update_dialog_fields_from_template()
+        
+        # 最近編集したスプライトの一覧を meta から復元
+        self.load_recent_edits()
+
+    def open_sprite_wal(self):
+        """
+        :jp 現在の保存先用の編集ログを用意します（ログの場所と新旧の判定は実際の保存先ファイルに合わせる）。
+            読み取り専用モードではログを使わない
+        :en Set up the edit log for the current store (its location and staleness follow the store's real file).
+            Read-only mode uses no log
+        """
+        if self.sprite_wal is not None:
+            self.sprite_wal.close()
+        self.sprite_wal = None if self.read_only else WriteAheadLog(self.sprite_store.path, self.sprite_store.modified_ns)
+        self.pending_recovery = None
+
+    def convert_sprite_records(self):
+        """
+        :jp 読み込んだスプライト辞書をSpriteレコードに変換します（_primary_は辞書のまま）
+        :en Convert loaded sprite dicts into Sprite records (_primary_ stays a dict)
+        """
+        field_types = self.sprite_data.get("meta", {}).get("field_types")
+        sprites = self.sprite_data.get("sprites", {})
+        if hasattr(sprites, 'bind_schema'):
+            # :jp シャード形式・SQLiteは各スプライトの読み込み時に変換する
+            # :en Sharded and SQLite sprites are converted when each one is loaded
+            self.sprite_schema = FieldSchema.from_template(sprites.get("_primary_", {}), field_types)
+            sprites.bind_schema(self.sprite_schema)
+            return
+        self.sprite_data["sprites"], self.sprite_schema = sprites_from_json(sprites, field_types)
 
     def create_initial_sprite_json(self, pyxres_file):
         """
@@ -475,20 +1316,18 @@ class SpriteDefiner:
         json_file = os.path.splitext(pyxres_file)[0] + '.json'
         
         try:
-            # テンプレートファイルをコピー
-            shutil.copy2(template_file, json_file)
-            
-            # コピーしたファイルを読み込み、resource_fileのみ変更
-            with open(json_file, 'r', encoding='utf-8') as f:
+            # テンプレートファイルを読み込み、resource_fileのみ変更
+            with open(template_file, 'r', encoding='utf-8') as f:
                 template_data = json.load(f)
             
             # resource_fileを選択されたpyxresファイル名に変更
             template_data["meta"]["resource_file"] = os.path.basename(pyxres_file)
             
             # _primary_ は特殊グループとして保持（削除しない）
-            # 変更されたデータを保存
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(template_data, f, indent=2, ensure_ascii=False)
+            # 変更されたデータを保存（読み取り専用モードではメモリ上のみ）
+            if not self.read_only:
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump(template_data, f, indent=2, ensure_ascii=False)
             
             return template_data
             
@@ -523,19 +1362,163 @@ class SpriteDefiner:
                 }
             }
 
+    def update_collision_masks(self):
+        """
+        :jp 定義済みスプライトの当たり判定マスクと外接矩形を更新します（変更タイルのみ）
+        :en Update collision masks and bounding boxes of defined sprites (changed tiles only)
+        """
+        if not self.resource_loaded or not self.sprite_data or not bank_analysis.available():
+            return 0
+        
+        pixels = bank_analysis.bank_pixels(pyxel.images[0])
+        sprite_size = self.sprite_data.get("meta", {}).get("sprite_size", 8)
+        changed = bank_analysis.update_collision(self.sprite_data, pixels, TRANSPARENT_COLOR, sprite_size)
+        if changed:
+            print(f"Updated collision data for {changed} tiles")
+        return changed
+
     def save_sprite_json(self):
         """
         :jp スプライトJSONファイルを保存
         :en Save sprite JSON file
         """
+        # :jp 保存はすべての編集の後に呼ばれるため、ここで変更回数を進める
+        # :en Every edit ends with a save, so advance the revision here
+        self.sprite_data_version += 1
+        if self.read_only:
+            return
         if self.sprite_data and self.sprite_json_file:
+            self.update_collision_masks()
             try:
-                with open(self.sprite_json_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.sprite_data, f, indent=2, ensure_ascii=False)
-                print(f"Saved sprite definitions: {self.sprite_json_file}")
+                # :jp 1ファイル形式は一時ファイル経由で置き換え、シャード形式・SQLiteは変更分だけを書き込む
+                # :en A single file is replaced via a temp file; sharded and SQLite stores write only changes
+                if self.sprite_store is None:
+                    self.sprite_store = sprite_storage.open_store(self.sprite_json_file)
+                self.sprite_store.save(self.sprite_data)
+                
+                # :jp 保存が完了したのでログは不要
+                # :en The save is complete, so the log is no longer needed
+                if self.sprite_wal is not None:
+                    self.sprite_wal.clear()
+                print(f"Saved sprite definitions: {self.sprite_store.path}")
             except Exception as e:
                 print(f"Error saving sprite JSON: {e}")
 
+    def load_recent_edits(self):
+        """
+        :jp meta.recent_edits から最近編集したスプライトの一覧を復元します
+        :en Restore the recently edited sprites from meta.recent_edits
+        """
+        meta = self.sprite_data.get("meta", {}) if self.sprite_data else {}
+        self.recent_edits = RecentEdits.from_json(meta.get("recent_edits"))
+
+    def touch_recent_edit(self, sprite_key):
+        """
+        :jp スプライトを最近編集した一覧の先頭に移し、meta.recent_edits に反映します（次の保存で書き込まれる）
+        :en Move a sprite to the front of the recent edits and mirror it in meta.recent_edits
+            (written by the next save)
+        """
+        sprite = self.sprite_data["sprites"][sprite_key]
+        self.recent_edits.touch(sprite_key, sprite.get("x", 0), sprite.get("y", 0), sprite.get("NAME", ""))
+        self.sprite_data.setdefault("meta", {})["recent_edits"] = self.recent_edits.to_json()
+
+    def jump_to_recent_edit(self, index):
+        """
+        :jp 最近編集した index 番目（0が最新）のスプライトを選択し、見える位置までスクロールします
+        :en Select the index-th most recently edited sprite (0 = newest) and scroll it into view
+        """
+        entries = self.recent_edits.newest(index + 1)
+        if index >= len(entries):
+            return
+        _, x, y, name = entries[index]
+        self.selected_tile_x, self.selected_tile_y = x, y
+        self.viewport.scroll_into_view(x, y)
+        print(f"Jumped to recent edit {index + 1}: ({x}, {y}) {name}")
+
+    def draw_recent_edits(self):
+        """
+        :jp 最近編集したスプライトのパネルを描画します（最新が黄色, 左の数字がジャンプ用のキー）
+        :en Draw the recent edits panel (newest in yellow; the number on the left is its jump key)
+        """
+        entries = self.recent_edits.newest(len(RECENT_EDIT_KEYS))
+        line_height = pyxel.FONT_HEIGHT + 2
+        width = 100
+        height = (max(len(entries), 1) + 1) * line_height + 4
+        x = self.display_x + self.viewport.width - width - 2
+        y = self.display_y + self.viewport.height - height - 2
+        
+        self.gfx.rect(x, y, width, height, pyxel.COLOR_BLACK)
+        self.gfx.rectb(x, y, width, height, pyxel.COLOR_GRAY)
+        self.gfx.text(x + 3, y + 3, f"Recent Edit ({len(self.recent_edits)})", pyxel.COLOR_CYAN)
+        if not entries:
+            self.gfx.text(x + 3, y + 3 + line_height, "None yet", pyxel.COLOR_GRAY)
+        for number, (_, tile_x, tile_y, name) in enumerate(entries, 1):
+            color = pyxel.COLOR_YELLOW if number == 1 else pyxel.COLOR_WHITE
+            label = f"{number} {name[:8] or '-':<8} ({tile_x},{tile_y})"
+            self.gfx.text(x + 3, y + 3 + number * line_height, label, color)
+
+    def log_sprite_edit(self, sprite_key):
+        """
+        :jp スプライトの編集結果を保存前にログへ書き込み、ホットリロード接続中のゲームへ送ります
+        :en Write an edited sprite to the log before saving, and push it to hot-reload clients
+        """
+        sprite = self.sprite_data["sprites"][sprite_key]
+        if self.sprite_wal is not None:
+            try:
+                self.sprite_wal.append("put", sprite_key, sprite)
+            except OSError as e:
+                print(f"Warning: could not write edit log: {e}")
+        if self.hot_reload is not None:
+            self.hot_reload.publish("put", sprite_key, sprite)
+
+    def check_pending_recovery(self):
+        """
+        :jp 保存先より新しい編集ログがあれば復旧確認を表示します
+        :en Show the recovery prompt if an edit log newer than the store exists
+        """
+        records = self.sprite_wal.pending() if self.sprite_wal else []
+        self.pending_recovery = records or None
+        if not records and self.sprite_wal and self.sprite_wal.is_stale():
+            # :jp 保存先より古いログは保存済みの内容なので削除する（残すと次の編集が追記され、
+            #     次回の復旧で古いレコードが新しい内容を上書きしてしまう）
+            # :en A log older than the store is already saved, so delete it (left in place, later
+            #     edits would append to it and the next recovery would replay stale records)
+            self.sprite_wal.clear()
+            print(f"Removed stale edit log: {self.sprite_wal.path}")
+        if records:
+            print(f"Found {len(records)} unsaved edits in {self.sprite_wal.path}. Recover? (Y/N)")
+
+    def update_recovery_prompt(self):
+        """
+        :jp 復旧確認のY/N入力を処理します
+        :en Handle Y/N input for the recovery prompt
+        """
+        if self.input.btnp(pyxel.KEY_Y):
+            count = replay_wal(self.sprite_data, self.pending_recovery, self.sprite_schema)
+            self.pending_recovery = None
+            self.save_sprite_json()
+            print(f"Recovered {count} edits")
+        elif self.input.btnp(pyxel.KEY_N):
+            self.pending_recovery = None
+            self.sprite_wal.clear()
+            print("Discarded unsaved edits")
+
+    def draw_recovery_prompt(self):
+        """
+        :jp 復旧確認のメッセージを描画します
+        :en Draw the recovery prompt
+        """
+        lines = (f"Found {len(self.pending_recovery)} unsaved edits",
+                 "Recover them? [Y]Yes / [N]Discard")
+        width = max(len(line) for line in lines) * pyxel.FONT_WIDTH + 8
+        height = len(lines) * (pyxel.FONT_HEIGHT + 2) + 8
+        x = (self.WIDTH - width) // 2
+        y = (self.HEIGHT - height) // 2
+        self.gfx.rect(x, y, width, height, pyxel.COLOR_NAVY)
+        self.gfx.rectb(x, y, width, height, pyxel.COLOR_YELLOW)
+        for i, line in enumerate(lines):
+            self.gfx.text(x + 4, y + 4 + i * (pyxel.FONT_HEIGHT + 2), line, pyxel.COLOR_YELLOW)
+
     def add_sprite_at_position(self, x, y):
         """
         :jp 指定座標にスプライトを追加（_primary_の構造を参考に作成）
@@ -549,7 +1532,7 @@ class SpriteDefiner:
         # _primary_ の構造を参考に新しいスプライトを作成
         if "_primary_" in self.sprite_data["sprites"]:
             template_sprite = self.sprite_data["sprites"]["_primary_"]
-            new_sprite = template_sprite.copy()  # 全フィールドをコピー
+            new_sprite = Sprite.from_json(template_sprite, self.sprite_schema)  # 全フィールドをコピー
             
             # 座標のみ更新
             new_sprite["x"] = x
@@ -557,6 +1540,8 @@ class SpriteDefiner:
             
             # スプライトを追加
             self.sprite_data["sprites"][sprite_key] = new_sprite
+            self.touch_recent_edit(sprite_key)
+            self.log_sprite_edit(sprite_key)
             
             # JSONファイルに保存
             self.save_sprite_json()
@@ -583,7 +1568,7 @@ class SpriteDefiner:
                 y = sprite_data.get("y", 0)
                 
                 # テンプレート構造をコピー
-                updated_sprite = template_sprite.copy()
+                updated_sprite = Sprite.from_json(template_sprite, self.sprite_schema)
                 
                 # 座標を復元
                 updated_sprite["x"] = x
@@ -591,6 +1576,7 @@ class SpriteDefiner:
                 
                 # 更新
                 self.sprite_data["sprites"][sprite_key] = updated_sprite
+                self.log_sprite_edit(sprite_key)
         
         # 変更を保存
         self.save_sprite_json()
@@ -615,25 +1601,11 @@ class SpriteDefiner:
         if not self.resource_loaded or self.selected_tile_x is None or self.selected_tile_y is None:
             return
             
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT):
-            mouse_x, mouse_y = pyxel.mouse_x, pyxel.mouse_y
-            
-            # マウス座標をリソース座標系に変換
-            display_width = 240
-            display_height = 200
-            if (self.display_x <= mouse_x < self.display_x + display_width and
-                self.display_y <= mouse_y < self.display_y + display_height):
-                
-                relative_x = mouse_x - self.display_x
-                relative_y = mouse_y - self.display_y
-                resource_x = self.scroll_x + relative_x
-                resource_y = self.scroll_y + relative_y
-                tile_x = (resource_x // 8) * 8
-                tile_y = (resource_y // 8) * 8
-                
-                # 選択されたタイル上での右クリックかチェック
-                if tile_x == self.selected_tile_x and tile_y == self.selected_tile_y:
-                    self.show_sprite_edit_dialog(tile_x, tile_y)
+        if self.input.btnp(pyxel.MOUSE_BUTTON_RIGHT):
+            # マウス座標をリソース座標系のタイルに変換し、選択されたタイル上での右クリックかチェック
+            tile = self.viewport.tile_at(self.input.mouse_x, self.input.mouse_y)
+            if tile is not None and tile == (self.selected_tile_x, self.selected_tile_y):
+                self.show_sprite_edit_dialog(*tile)
 
     def show_sprite_edit_dialog(self, x, y):
         """
@@ -651,39 +1623,54 @@ class SpriteDefiner:
         print(f"Opening sprite editor for ({x}, {y}):")
         print(f"Current properties: {sprite_info}")
         
-        # スプライト編集ダイアログを表示
-        self.sprite_edit_controller.show_sprite_edit_dialog(sprite_info)
+        # スプライト編集ダイアログを表示（再生時は記録された結果を使う）
+        if self.input.replaying:
+            return
+        self.ensure_dialogs()
+        self.sprite_edit_controller.show_sprite_edit_dialog(sprite_info.to_json())
+        self.dialog_events.opened("sprite_edit", self.sprite_edit_controller)
         print(f"Opened sprite editor for ({x}, {y})")
 
-    def check_sprite_edit_result(self):
+    def on_sprite_edit_result(self, result_data):
         """
-        :jp スプライト編集ダイアログの結果をチェックし、変更を適用
-        :en Check sprite edit dialog result and apply changes
+        :jp スプライト編集ダイアログの完了イベント。変更を適用します
+        :en Sprite edit dialog completion event; applies the changes
         """
-        if not self.sprite_edit_controller.is_active():
-            result_data = self.sprite_edit_controller.get_result()
+        if result_data and result_data["result"] == "OK" and result_data["data"]:
+            # 宣言された型（meta.field_types）に一度だけ変換し、不正な入力はダイアログで差し戻す
+            edited_data, errors = self.sprite_schema.validate(result_data["data"])
+            if errors:
+                for error in errors:
+                    print(f"Invalid input: {error}")
+                if not self.input.replaying:
+                    # :jp ダイアログは初回使用時に作られるため、ここではまだ無いことがある
+                    # :en Dialogs are created on first use, so the controller may not exist yet
+                    self.ensure_dialogs()
+                    self.sprite_edit_controller.show_sprite_edit_dialog(result_data["data"])
+                    self.dialog_events.opened("sprite_edit", self.sprite_edit_controller)
+                return
             
-            if result_data and result_data["result"] == "OK" and result_data["data"]:
-                # 編集されたデータを適用
-                edited_data = result_data["data"]
-                x = edited_data.get("x", 0)
-                y = edited_data.get("y", 0)
-                sprite_key = f"{x}_{y}"
-                
-                # スプライトデータを更新
-                if sprite_key in self.sprite_data["sprites"]:
-                    self.sprite_data["sprites"][sprite_key].update(edited_data)
-                    
-                    # JSONファイルに保存
-                    self.save_sprite_json()
-                    
-                    print(f"Updated sprite at ({x}, {y})")
-                    print(f"New properties: {edited_data}")
-                else:
-                    print(f"Error: Sprite {sprite_key} not found")
+            # 編集されたデータを適用
+            x = edited_data.get("x", 0)
+            y = edited_data.get("y", 0)
+            sprite_key = f"{x}_{y}"
             
-            elif result_data and result_data["result"] == "CANCEL":
-                print("Sprite edit canceled")
+            # スプライトデータを更新
+            if sprite_key in self.sprite_data["sprites"]:
+                self.sprite_data["sprites"][sprite_key].update(edited_data)
+                self.touch_recent_edit(sprite_key)
+                self.log_sprite_edit(sprite_key)
+                
+                # JSONファイルに保存
+                self.save_sprite_json()
+                
+                print(f"Updated sprite at ({x}, {y})")
+                print(f"New properties: {edited_data}")
+            else:
+                print(f"Error: Sprite {sprite_key} not found")
+        
+        elif result_data and result_data["result"] == "CANCEL":
+            print("Sprite edit canceled")
 
     def draw_selected_sprite_name(self):
         """
@@ -696,6 +1683,29 @@ class SpriteDefiner:
             not self.sprite_data):
             return
             
+        # 選択状態とデータ変更回数が同じならキャッシュ済みラベルを使用
+        label, text_width = self.label_cache.get(
+            'selected',
+            (self.selected_tile_x, self.selected_tile_y, self.sprite_data_version),
+            self.build_selected_sprite_label
+        )
+        
+        # グリッドの下に表示（y座標 = display_y + display_height + 5）
+        display_height = self.viewport.height
+        text_y = self.display_y + display_height + 5
+        text_x = self.display_x
+        
+        # 背景を描画して見やすくする
+        self.gfx.rect(text_x, text_y, text_width + 4, pyxel.FONT_HEIGHT + 2, pyxel.COLOR_NAVY)
+        
+        # テキストを描画
+        self.gfx.text(text_x + 2, text_y + 1, label, pyxel.COLOR_WHITE)
+
+    def build_selected_sprite_label(self):
+        """
+        :jp 選択されたスプライトの表示文字列を作成します
+        :en Build the display text for the selected sprite
+        """
         # 選択されたタイルのスプライト情報を取得
         sprite_info = self.get_sprite_at_position(self.selected_tile_x, self.selected_tile_y)
         
@@ -703,31 +1713,14 @@ class SpriteDefiner:
             sprite_name = sprite_info["NAME"]
             
             # テンプレート初期値の場合は空文字として扱う
-            if sprite_name in ["Reserved Field", "SpriteName", "ActionName", "Animation Number"]:
+            if sprite_name in PLACEHOLDER_NAMES:
                 sprite_name = "(No Name)"
             
-            # グリッドの下に表示（y座標 = display_y + display_height + 5）
-            display_height = 200
-            text_y = self.display_y + display_height + 5
-            text_x = self.display_x
-            
-            # 背景を描画して見やすくする
-            text_width = len(f"Selected: {sprite_name}") * pyxel.FONT_WIDTH
-            pyxel.rect(text_x, text_y, text_width + 4, pyxel.FONT_HEIGHT + 2, pyxel.COLOR_NAVY)
-            
-            # テキストを描画
-            pyxel.text(text_x + 2, text_y + 1, f"Selected: {sprite_name}", pyxel.COLOR_WHITE)
-        else:
-            # スプライト情報がない場合
-            display_height = 200
-            text_y = self.display_y + display_height + 5
-            text_x = self.display_x
-            
-            sprite_key = f"{self.selected_tile_x}_{self.selected_tile_y}"
-            text_width = len(f"Selected: {sprite_key} (No Data)") * pyxel.FONT_WIDTH
-            pyxel.rect(text_x, text_y, text_width + 4, pyxel.FONT_HEIGHT + 2, pyxel.COLOR_NAVY)
-            
-            pyxel.text(text_x + 2, text_y + 1, f"Selected: {sprite_key} (No Data)", pyxel.COLOR_WHITE)
+            return f"Selected: {sprite_name}"
+        
+        # スプライト情報がない場合
+        sprite_key = f"{self.selected_tile_x}_{self.selected_tile_y}"
+        return f"Selected: {sprite_key} (No Data)"
 
     def update_dialog_fields_from_template(self):
         """
@@ -766,11 +1759,46 @@ class SpriteDefiner:
             if i < len(fixed_widget_ids):
                 field_mappings[field_name] = fixed_widget_ids[i]
         
-        # ダイアログコントローラーにフィールドマッピングを設定
-        self.sprite_edit_controller.field_mappings = field_mappings
+        # ダイアログコントローラーにフィールドマッピングを設定（未生成なら生成時に設定）
+        self.sprite_field_mappings = field_mappings
+        if self.sprite_edit_controller is not None:
+            self.sprite_edit_controller.field_mappings = field_mappings
         
         print(f"Updated dialog fields from template: {list(field_mappings.keys())}")
 
 
 if __name__ == "__main__":
-    SpriteDefiner()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SpriteDefiner - Visual Sprite Definition Tool for Pyxel")
+    parser.add_argument('--startup-timing', action='store_true',
+                        help="print import/init/first-frame timings")
+    parser.add_argument('--cache-mb', type=float, default=DEFAULT_BUDGET_MB,
+                        help="memory budget for cached open projects (MiB)")
+    parser.add_argument('--headless', nargs=2, metavar=('PYXRES', 'PNG'),
+                        help="render PYXRES (and its JSON) without a window and write PNG")
+    parser.add_argument('--scale', type=int, default=1, help="PNG scale for --headless")
+    parser.add_argument('--heatmap', action='store_true', help="draw the tile usage heatmap (--headless)")
+    parser.add_argument('--minimap', action='store_true', help="draw the minimap (--headless)")
+    parser.add_argument('--hot-reload-port', type=int, metavar='PORT',
+                        help="push sprite edits to running games on localhost:PORT")
+    parser.add_argument('--record', metavar='FILE', help="record the input of this session to FILE")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="replay a recorded session headlessly (read-only) at full speed and report frame timings")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay_input = ReplayInput(args.replay)
+        app = SpriteDefiner(cache_mb=args.cache_mb, headless=True, replay_input=replay_input, read_only=True)
+        report_timings(replay_session(app, replay_input))
+    elif args.headless:
+        pyxres_file, png_file = args.headless
+        app = SpriteDefiner(cache_mb=args.cache_mb, headless=True, read_only=True)
+        app.load_pyxres_file(pyxres_file)
+        if not app.resource_loaded:
+            sys.exit(1)
+        app.show_usage_heatmap = args.heatmap and app.tile_usage_counts is not None
+        app.show_minimap = args.minimap and bank_analysis.available()
+        app.render_png(png_file, args.scale)
+        print(f"Rendered {pyxres_file} to {png_file}")
+    else:
+        SpriteDefiner(startup_timing=args.startup_timing, cache_mb=args.cache_mb, record_file=args.record,
+                      hot_reload_port=args.hot_reload_port)
\ No newline at end of file
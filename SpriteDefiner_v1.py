@@ -15,6 +15,8 @@ import json
 from collections import namedtuple
 from enum import Enum
 
+from label_cache import LabelCache
+
 # アプリケーションの状態管理
 class AppState(Enum):
     VIEW = "view"
@@ -60,6 +62,7 @@ class SpriteDefiner:
         
         # 状態管理 - 新フォーマット: キーワードフィールド
         self.sprites = {}  # {key: {'x': x, 'y': y, 'NAME': name, 'ACT_NAME': val, 'FRAME_NUM': val, ...}}
+        self.sprites_version = 0  # スプライトデータの変更回数（読み込み・編集で進める。表示キャッシュのキー）
         self.selected_sprite = None  # (x, y)
         self.cursor_sprite = (0, 0)  # 現在のカーソル位置 (x, y)
         self.hover_sprite = None  # マウスホバー位置 (x, y)
@@ -77,6 +80,9 @@ class SpriteDefiner:
         self.edit_locked_sprite = None  # 編集中にロックされたスプライト位置
         
         
+        # ラベルキャッシュ（スプライト情報パネル用）
+        self.label_cache = LabelCache()
+        
         self.message = "Use arrow keys to move (auto-select), F1 for EDIT, F2 for VIEW, Shift+Enter for legacy naming"
         
         # UI位置
@@ -121,6 +127,8 @@ class SpriteDefiner:
                     
                     self.sprites[key] = sprite_entry
             
+            self.sprites_version += 1
+            
             # 起動メッセージ
             self.message = f"Startup: Auto-loaded {len(self.sprites)} sprites from sprites.json"
         except FileNotFoundError:
@@ -379,6 +387,7 @@ class SpriteDefiner:
                     'NAME': self.input_text,
                     'ACT_NAME': 'UNDEF'  # 新フォーマット: デフォルト値
                 }
+                self.sprites_version += 1
                 self.message = f"Added sprite '{self.input_text}'"
                 self.selected_sprite = None
             self.app_state = AppState.VIEW
@@ -460,6 +469,7 @@ class SpriteDefiner:
         sprite_entry.update(existing_fields)
         
         self.sprites[sprite_key] = sprite_entry
+        self.sprites_version += 1
         
         # 編集済みスプライト名リストに追加
         self._add_edited_sprite_name(self.command_input)
@@ -477,6 +487,7 @@ class SpriteDefiner:
                 
                 if field_key in self.SPRITE_FIELDS.values():
                     self.sprites[sprite_key][field_key] = self.command_input
+                    self.sprites_version += 1
                     
                     # 編集済みスプライト名リストに追加（現在のスプライト名を取得）
                     sprite_name = self.sprites[sprite_key].get('NAME', 'NONAME')
@@ -495,6 +506,7 @@ class SpriteDefiner:
                 'NAME': 'NONAME',
                 'ACT_NAME': 'UNDEF'  # 新フォーマット: デフォルト値
             }
+            self.sprites_version += 1
             self.message = "Created new sprite - Set NAME first"
 
     # コマンド入力完了時の処理（スプライト名やフィールドの設定）
@@ -592,6 +604,7 @@ class SpriteDefiner:
                     
                     self.sprites[key] = sprite_entry
                     
+            self.sprites_version += 1
             self.message = f"F11: Loaded {len(self.sprites)} sprites from sprites.json"
         except FileNotFoundError:
             # JSONファイルが存在しない場合のメッセージ
@@ -749,14 +762,18 @@ class SpriteDefiner:
         message_color = pyxel.COLOR_YELLOW if self.app_state in [AppState.SAVE_CONFIRM, AppState.QUIT_CONFIRM] else pyxel.COLOR_WHITE
         pyxel.text(10, y_pos + 36, self.message, message_color)
     
+    # 現在の対象スプライト位置を取得
+    def _get_current_position(self):
+        """現在の対象スプライト位置を取得"""
+        # EDITモードではロックされたスプライト情報を表示、VIEWモードではカーソル情報を表示
+        if self.app_state == AppState.EDIT and self.edit_locked_sprite:
+            return self.edit_locked_sprite
+        return self.cursor_sprite
+    
     # 現在の対象スプライト情報を取得
     def _get_current_sprite_info(self):
         """現在のスプライト情報を取得（位置、名前、タグ）"""
-        # EDITモードではロックされたスプライト情報を表示、VIEWモードではカーソル情報を表示
-        if self.app_state == AppState.EDIT and self.edit_locked_sprite:
-            x, y = self.edit_locked_sprite
-        else:
-            x, y = self.cursor_sprite
+        x, y = self._get_current_position()
         
         sprite_number = self._get_sprite_number(x, y)
         
@@ -774,35 +791,29 @@ class SpriteDefiner:
 
     def _draw_dynamic_info(self, x_pos):
         """カーソル位置に基づく動的スプライト情報を描画"""
-        x, y, sprite_number, sprite_name, sprite_data = self._get_current_sprite_info()
+        # 表示文字列は対象位置かスプライトデータの変更回数が変わった時だけ再構築
+        # （スプライトの検索も再構築時のみ）
+        state = (*self._get_current_position(), self.sprites_version)
+        lines = self.label_cache.get_lines(
+            'dynamic_info',
+            state,
+            lambda: self._build_dynamic_info_lines(*self._get_current_sprite_info())
+        )
         
         # ヘッダー - 常時表示
         pyxel.text(x_pos, self.sprite_display_y, "Sprite Details", pyxel.COLOR_CYAN)
-        pyxel.text(x_pos, self.sprite_display_y + 12, f"Position: ({x}, {y})", pyxel.COLOR_WHITE)
-        pyxel.text(x_pos, self.sprite_display_y + 22, f"Number: #{sprite_number}", pyxel.COLOR_WHITE)
-        pyxel.text(x_pos, self.sprite_display_y + 32, f"N]Name: {sprite_name}", pyxel.COLOR_YELLOW)
+        pyxel.text(x_pos, self.sprite_display_y + 12, lines[0], pyxel.COLOR_WHITE)
+        pyxel.text(x_pos, self.sprite_display_y + 22, lines[1], pyxel.COLOR_WHITE)
+        pyxel.text(x_pos, self.sprite_display_y + 32, lines[2], pyxel.COLOR_YELLOW)
         
         # フィールド情報（新フォーマット）
-        act_name = sprite_data.get('ACT_NAME', 'NO_ACT')
-        frame_num = sprite_data.get('FRAME_NUM', 'NO_FRAME')
-        anim_speed = sprite_data.get('ANIM_SPD', 'NO_SPEED')
-        
-        pyxel.text(x_pos, self.sprite_display_y + 42, f"1]ACT_NAME: {act_name}", pyxel.COLOR_GREEN)
-        pyxel.text(x_pos, self.sprite_display_y + 52, f"2]FRAME_NUM: {frame_num}", pyxel.COLOR_GREEN)
-        pyxel.text(x_pos, self.sprite_display_y + 62, f"3]ANIM_SPD: {anim_speed}", pyxel.COLOR_GREEN)
+        pyxel.text(x_pos, self.sprite_display_y + 42, lines[3], pyxel.COLOR_GREEN)
+        pyxel.text(x_pos, self.sprite_display_y + 52, lines[4], pyxel.COLOR_GREEN)
+        pyxel.text(x_pos, self.sprite_display_y + 62, lines[5], pyxel.COLOR_GREEN)
         
         # EXT情報
-        ext1 = sprite_data.get('EXT1', 'NO_EXT')
-        ext2 = sprite_data.get('EXT2', 'NO_EXT')
-        ext3 = sprite_data.get('EXT3', 'NO_EXT')
-        ext4 = sprite_data.get('EXT4', 'NO_EXT')
-        ext5 = sprite_data.get('EXT5', 'NO_EXT')
-        
-        pyxel.text(x_pos, self.sprite_display_y + 72, f"4]EXT1: {ext1}", pyxel.COLOR_GRAY)
-        pyxel.text(x_pos, self.sprite_display_y + 82, f"5]EXT2: {ext2}", pyxel.COLOR_GRAY)
-        pyxel.text(x_pos, self.sprite_display_y + 92, f"6]EXT3: {ext3}", pyxel.COLOR_GRAY)
-        pyxel.text(x_pos, self.sprite_display_y + 102, f"7]EXT4: {ext4}", pyxel.COLOR_GRAY)
-        pyxel.text(x_pos, self.sprite_display_y + 112, f"8]EXT5: {ext5}", pyxel.COLOR_GRAY)
+        for i in range(5):
+            pyxel.text(x_pos, self.sprite_display_y + 72 + i * 10, lines[6 + i], pyxel.COLOR_GRAY)
         
         # モードインジケータ
         mode_text = "EDIT" if self.app_state == AppState.EDIT else "VIEW"
@@ -811,28 +822,50 @@ class SpriteDefiner:
         
         # モードに基づくコンテンツ
         if self.app_state == AppState.EDIT:
-            self._draw_edit_content(x_pos, sprite_data)
+            self._draw_edit_content(x_pos, state)
         else:
             self._draw_view_content(x_pos)
     
-    def _draw_edit_content(self, x_pos, sprite_data):
+    def _build_dynamic_info_lines(self, x, y, sprite_number, sprite_name, sprite_data):
+        """スプライト情報パネルの表示文字列を作成"""
+        lines = [
+            f"Position: ({x}, {y})",
+            f"Number: #{sprite_number}",
+            f"N]Name: {sprite_name}",
+            f"1]ACT_NAME: {sprite_data.get('ACT_NAME', 'NO_ACT')}",
+            f"2]FRAME_NUM: {sprite_data.get('FRAME_NUM', 'NO_FRAME')}",
+            f"3]ANIM_SPD: {sprite_data.get('ANIM_SPD', 'NO_SPEED')}",
+        ]
+        for i in range(1, 6):
+            lines.append(f"{i + 3}]EXT{i}: {sprite_data.get(f'EXT{i}', 'NO_EXT')}")
+        return lines
+    
+    def _draw_edit_content(self, x_pos, state):
         """編集モードのコンテンツを描画"""
         start_y = self.sprite_display_y + 138  # DIC+EXT表示に対応するため下に移動
         
         pyxel.text(x_pos, start_y, "Current Fields:", pyxel.COLOR_WHITE)
         
+        # 表示文字列はスプライト情報パネルと同じ状態キーでキャッシュ
+        field_lines = self.label_cache.get_lines(
+            'edit_fields',
+            state,
+            lambda: self._build_edit_field_lines(self._get_current_sprite_info()[4])
+        )
+        
         field_y = 12
-        field_count = 0
-        for field_key in ['ACT_NAME', 'FRAME_NUM', 'ANIM_SPD']:
-            if field_key in sprite_data:
-                field_name = f"{field_key}: {sprite_data[field_key]}"
-                pyxel.text(x_pos, start_y + field_y, field_name, pyxel.COLOR_GREEN)
-                field_y += 10
-                field_count += 1
-        
-        if field_count == 0:
+        for field_name in field_lines:
+            pyxel.text(x_pos, start_y + field_y, field_name, pyxel.COLOR_GREEN)
+            field_y += 10
+        
+        if not field_lines:
             pyxel.text(x_pos, start_y + field_y, "No fields defined", pyxel.COLOR_GRAY)
     
+    def _build_edit_field_lines(self, sprite_data):
+        """編集モードのフィールド一覧の表示文字列を作成"""
+        return [f"{field_key}: {sprite_data[field_key]}"
+                for field_key in ['ACT_NAME', 'FRAME_NUM', 'ANIM_SPD'] if field_key in sprite_data]
+    
     def _draw_view_content(self, x_pos):
         """ビューモードのコンテンツを描画 - シンプルなステータス"""
         start_y = self.sprite_display_y + 138  # DIC+EXT表示に対応するため下に移動
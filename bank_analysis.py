@@ -0,0 +1,293 @@
+"""
+bank_analysis - Vectorized analysis of Pyxel image banks (NumPy)
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import zlib
+
+# :jp NumPyは任意依存（未インストール時は解析機能のみ無効）
+# :en NumPy is optional (only the analysis features are disabled without it)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# :jp タイルのダイジェスト計算用の重み（固定値の奇数64bit整数）
+# :en Weights for tile digests (fixed odd 64-bit integers)
+_DIGEST_SEED = 0x9E3779B97F4A7C15
+
+# :jp 空のセルとみなすタイル座標 (tx, ty)。Pyxelのタイルマップは未配置のセルが (0, 0) のため
+# :en Tile coords (tx, ty) treated as an empty cell; unpainted Pyxel tilemap cells are (0, 0)
+EMPTY_TILE = (0, 0)
+
+
+def available():
+    """
+    :jp NumPyが利用可能かどうかを返します
+    :en Return whether NumPy is available
+    """
+    return np is not None
+
+
+def bank_pixels(image):
+    """
+    :jp Pyxelのイメージを (高さ, 幅) のuint8配列として返します（コピーせずに参照）
+    :en Return a Pyxel image as a (height, width) uint8 array (a view, not a copy)
+    """
+    return np.ctypeslib.as_array(image.data_ptr()).reshape(image.height, image.width)
+
+
+def tile_blocks(pixels, size=8):
+    """
+    :jp 画素配列を (タイル行, タイル列, size, size) に並べ替えたビューを返します
+    :en Return a (tile rows, tile cols, size, size) view of a pixel array
+    """
+    rows = pixels.shape[0] // size
+    cols = pixels.shape[1] // size
+    trimmed = pixels[:rows * size, :cols * size]
+    return trimmed.reshape(rows, size, cols, size).swapaxes(1, 2)
+
+
+def _digest_weights(count):
+    with np.errstate(over='ignore'):
+        weights = np.arange(1, count + 1, dtype=np.uint64) * np.uint64(_DIGEST_SEED)
+    return weights | np.uint64(1)
+
+
+def tile_digests(blocks):
+    """
+    :jp (n, size, size) のタイル群ごとに64bitダイジェストを計算します
+    :en Compute a 64-bit digest for each of n (size, size) tiles
+    """
+    flat = blocks.reshape(blocks.shape[0], -1).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        return (flat * _digest_weights(flat.shape[1])).sum(axis=1, dtype=np.uint64)
+
+
+def gather_tiles(pixels, positions, size=8):
+    """
+    :jp 指定座標 [(x, y), ...] のタイルを (n, size, size) 配列として取り出します
+    :en Gather the tiles at [(x, y), ...] as an (n, size, size) array
+    """
+    blocks = tile_blocks(pixels, size)
+    coords = np.array(positions, dtype=np.intp).reshape(-1, 2)
+    return blocks[coords[:, 1] // size, coords[:, 0] // size]
+
+
+def collision_data(blocks, colkey):
+    """
+    :jp 不透明ピクセルのビットマスク（1行=1バイト, 左端が最上位ビット）と
+        最小外接矩形 [x0, y0, x1, y1]（完全透明なら None）を一括計算します
+    :en Compute the opaque-pixel bitmask (one byte per row, leftmost pixel in the
+        most significant bit) and the tight bounding box [x0, y0, x1, y1]
+        (None when fully transparent) for all tiles at once
+    """
+    count, size = blocks.shape[0], blocks.shape[1]
+    opaque = blocks != colkey
+    packed = np.packbits(opaque.reshape(count, size, size), axis=2).reshape(count, -1)
+
+    rows_any = opaque.any(axis=2)
+    cols_any = opaque.any(axis=1)
+    has_pixels = rows_any.any(axis=1)
+    y0 = rows_any.argmax(axis=1)
+    y1 = size - 1 - rows_any[:, ::-1].argmax(axis=1)
+    x0 = cols_any.argmax(axis=1)
+    x1 = size - 1 - cols_any[:, ::-1].argmax(axis=1)
+
+    results = []
+    for i in range(count):
+        bbox = [int(x0[i]), int(y0[i]), int(x1[i]), int(y1[i])] if has_pixels[i] else None
+        results.append((packed[i].tobytes().hex(), bbox))
+    return results
+
+
+def sprite_positions(sprites):
+    """
+    :jp 定義済みスプライトの (キー, x, y) を返します（_primary_は除く）。
+        シャード形式の辞書ではシャードを読み込まずにインデックスから求めます
+    :en Return (key, x, y) of defined sprites (excluding _primary_). For sharded
+        dicts this comes from the index without loading shards
+    """
+    if hasattr(sprites, 'tile_positions'):
+        return sprites.tile_positions()
+    return [(key, sprite.get("x", 0), sprite.get("y", 0))
+            for key, sprite in sprites.items() if key != "_primary_"]
+
+
+def update_collision(sprite_data, pixels, colkey=0, size=8):
+    """
+    :jp 定義済みスプライトの当たり判定データを sprite_data["collision"] に保存します。
+        タイルのダイジェストが変わったもの（と新規のもの）だけを再計算します
+    :en Store collision data of defined sprites in sprite_data["collision"].
+        Only tiles whose digest changed (or new ones) are recomputed
+
+    :jp 戻り値は再計算または削除したエントリ数です
+    :en Returns the number of entries recomputed or removed
+    """
+    sprites = sprite_data.get("sprites", {})
+    height, width = pixels.shape
+    keys = []
+    positions = []
+    for key, x, y in sprite_positions(sprites):
+        if 0 <= x <= width - size and 0 <= y <= height - size:
+            keys.append(key)
+            positions.append((x, y))
+
+    collision = sprite_data.get("collision")
+    if not collision or collision.get("colkey") != colkey or collision.get("size") != size:
+        collision = {"colkey": colkey, "size": size, "tiles": {}}
+    old_tiles = collision["tiles"]
+    new_tiles = {}
+
+    changed = 0
+    if keys:
+        blocks = gather_tiles(pixels, positions, size)
+        digests = tile_digests(blocks)
+        dirty = []
+        for i, key in enumerate(keys):
+            digest = format(int(digests[i]), '016x')
+            entry = old_tiles.get(key)
+            if entry is not None and entry.get("digest") == digest:
+                new_tiles[key] = entry
+            else:
+                new_tiles[key] = {"digest": digest}
+                dirty.append(i)
+        if dirty:
+            for i, (mask, bbox) in zip(dirty, collision_data(blocks[dirty], colkey)):
+                new_tiles[keys[i]]["mask"] = mask
+                new_tiles[keys[i]]["bbox"] = bbox
+        changed = len(dirty)
+
+    removed = len(set(old_tiles) - set(new_tiles))
+    collision["tiles"] = new_tiles
+    sprite_data["collision"] = collision
+    return changed + removed
+
+
+def mask_rows(mask_hex):
+    """
+    :jp 保存されたマスク文字列を行ごとの整数ビットマスクに戻します（ゲーム側用）
+    :en Decode a stored mask string into per-row integer bitmasks (for the game side)
+    """
+    return list(bytes.fromhex(mask_hex))
+
+
+def tilemap_tiles(tilemap):
+    """
+    :jp Pyxelのタイルマップを (高さ, 幅, 2) の配列（各セル = タイル座標 (tx, ty)）として返します
+    :en Return a Pyxel tilemap as a (height, width, 2) array (each cell = tile coords (tx, ty))
+    """
+    data = np.ctypeslib.as_array(tilemap.data_ptr())
+    return data.reshape(tilemap.height, tilemap.width, 2)
+
+
+def tile_usage(tilemaps, bank_cols=32, bank_rows=32, empty_tile=EMPTY_TILE):
+    """
+    :jp タイルマップ群が参照しているタイルの使用回数を (bank_rows, bank_cols) 配列で返します。
+        empty_tile（既定は (0, 0)）を指すセルは空のセルとして数えません（None ですべてのセルを数える）。
+        全セルが (0, 0) のままの（未使用の）タイルマップは無視します
+    :en Return per-tile usage counts over the given tilemaps as a (bank_rows, bank_cols)
+        array. Cells pointing at empty_tile ((0, 0) by default) are empty and not counted
+        (None counts every cell). Tilemaps whose cells are all still (0, 0) (unused) are ignored
+    """
+    counts = np.zeros(bank_rows * bank_cols, dtype=np.int64)
+    for tiles in tilemaps:
+        if not tiles.any():
+            continue
+        tx = tiles[..., 0].ravel().astype(np.intp)
+        ty = tiles[..., 1].ravel().astype(np.intp)
+        valid = (tx < bank_cols) & (ty < bank_rows)
+        if empty_tile is not None:
+            valid &= (tx != empty_tile[0]) | (ty != empty_tile[1])
+        counts += np.bincount(ty[valid] * bank_cols + tx[valid], minlength=bank_rows * bank_cols)
+    return counts.reshape(bank_rows, bank_cols)
+
+
+def usage_flags(counts, sprites, size=8):
+    """
+    :jp 定義済みだが未使用のタイルと、使用されているが未定義のタイルを求めます
+    :en Find tiles that are defined but unused, and tiles that are used but undefined
+
+    :jp 戻り値は (defined_unused, used_undefined) で、いずれもタイル左上座標 (x, y) のリストです
+    :en Returns (defined_unused, used_undefined), both lists of tile top-left coords (x, y)
+    """
+    defined = np.zeros(counts.shape, dtype=bool)
+    for _, x, y in sprite_positions(sprites):
+        col, row = x // size, y // size
+        if 0 <= row < counts.shape[0] and 0 <= col < counts.shape[1]:
+            defined[row, col] = True
+
+    used = counts > 0
+    defined_unused = [(int(col) * size, int(row) * size) for row, col in zip(*np.nonzero(defined & ~used))]
+    used_undefined = [(int(col) * size, int(row) * size) for row, col in zip(*np.nonzero(used & ~defined))]
+    return defined_unused, used_undefined
+
+
+def usage_heat(counts, size=8, levels=3):
+    """
+    :jp 使用回数を対数スケールで 0..levels-1 の段階に分け、使用タイルごとに (x, y, 段階) を返します
+    :en Bucket usage counts into levels 0..levels-1 on a log scale and return (x, y, level) per used tile
+    """
+    rows, cols = np.nonzero(counts)
+    if rows.size == 0:
+        return []
+    scaled = np.log1p(counts[rows, cols]) / np.log1p(counts.max())
+    buckets = np.minimum((scaled * levels).astype(np.intp), levels - 1)
+    return [(int(col) * size, int(row) * size, int(level)) for row, col, level in zip(rows, cols, buckets)]
+
+
+def bank_digest(pixels):
+    """
+    :jp イメージバンク全体の変更検出用ダイジェスト（CRC32）を返します
+    :en Return a change-detection digest (CRC32) of a whole image bank
+    """
+    return zlib.crc32(np.ascontiguousarray(pixels))
+
+
+def downsample_mode(pixels, factor=4, colkey=0):
+    """
+    :jp factor x factor ごとに最も多い色で縮小します（透明色以外を優先し、全て透明なら透明色）
+    :en Downsample by taking the most frequent color of each factor x factor block
+        (non-transparent colors win; fully transparent blocks stay transparent)
+    """
+    blocks = tile_blocks(pixels, factor).reshape(pixels.shape[0] // factor, pixels.shape[1] // factor, -1)
+    counts = (blocks[..., None] == np.arange(16, dtype=blocks.dtype)).sum(axis=2)
+    counts[..., colkey] = 0
+    mode = counts.argmax(axis=2).astype(np.uint8)
+    mode[counts.max(axis=2) == 0] = colkey
+    return mode
+
+
+def sprite_density(sprites, bank_size=256, block=32):
+    """
+    :jp block x block ピクセルの領域ごとの定義済みスプライト数を (行, 列) 配列で返します
+    :en Return the number of defined sprites per block x block pixel region as a (rows, cols) array
+    """
+    cells = bank_size // block
+    counts = np.zeros((cells, cells), dtype=np.int64)
+    for _, x, y in sprite_positions(sprites):
+        if 0 <= x < bank_size and 0 <= y < bank_size:
+            counts[y // block, x // block] += 1
+    return counts
+
+
+def recolor(pixels, lut):
+    """
+    :jp 16色の変換表（バイト列）を画素配列全体に一括適用します
+    :en Apply a 16-entry color lookup table (bytes) to a whole pixel array at once
+    """
+    return np.frombuffer(lut, dtype=np.uint8)[pixels]
+
+
+def compose_tiles(pixels, tiles, size=8):
+    """
+    :jp タイル座標の配列 (行, 列, 2) からイメージバンクのタイルを並べた画素配列を作ります（bltm相当）
+    :en Build the pixel array for a (rows, cols, 2) array of tile coords from an image bank (like bltm)
+    """
+    blocks = tile_blocks(pixels, size)
+    tx = np.minimum(tiles[..., 0].astype(np.intp), blocks.shape[1] - 1)
+    ty = np.minimum(tiles[..., 1].astype(np.intp), blocks.shape[0] - 1)
+    rows, cols = tiles.shape[:2]
+    return blocks[ty, tx].swapaxes(1, 2).reshape(rows * size, cols * size)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+SpriteDefiner benchmark harness
+
+Usage:
+    python benchmark.py            # run all sections
+    python benchmark.py labels     # run selected sections only
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+import pyxel
+
+from label_cache import LabelCache
+from sprite_model import sprites_from_json
+
+# :jp 1セクションあたりの既定の反復回数（フレーム数）
+# :en Default iteration count (frames) per section
+FRAMES = 100000
+
+
+def measure(func, repeat=FRAMES):
+    """
+    :jp funcをrepeat回実行し、1回あたりの平均時間（マイクロ秒）を返します
+    :en Run func repeat times and return the mean time per call in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def report(section, rows):
+    """
+    :jp 計測結果を表形式で出力します
+    :en Print measurement results as a table
+    """
+    print(f"[{section}]")
+    for label, value, unit in rows:
+        print(f"  {label:<40} {value:>12.3f} {unit}")
+    print()
+
+
+def bench_labels():
+    """
+    :jp ステータス行の文字列生成: 毎フレーム生成とラベルキャッシュの比較
+    :en Status line text: per-frame formatting vs. the label cache
+    """
+    loaded_pyxres_file = os.path.join(".", "my_resource.pyxres")
+    scroll_x, scroll_y = 8, 16
+    selected = (40, 0)
+    sprite = {"x": 40, "y": 0, "NAME": "PBULLET", "ACT_NAME": "NO_ACT"}
+    placeholders = ["Reserved Field", "SpriteName", "ActionName", "Animation Number"]
+
+    def build_info():
+        selected_info = f"Tile: ({selected[0]},{selected[1]})" if selected[0] is not None else "Tile: None"
+        return f"Loaded: {os.path.basename(loaded_pyxres_file)} | Scroll: ({scroll_x},{scroll_y}) | {selected_info}"
+
+    def build_selected():
+        sprite_name = sprite["NAME"]
+        if sprite_name in placeholders:
+            sprite_name = "(No Name)"
+        return f"Selected: {sprite_name}"
+
+    # :jp 旧実装: 毎フレーム文字列と幅を再計算
+    # :en Old path: rebuild strings and widths every frame
+    def uncached_frame():
+        build_info()
+        len(build_selected()) * pyxel.FONT_WIDTH
+
+    cache = LabelCache()
+
+    # :jp 新実装: 状態キーが同じ間はキャッシュを返す
+    # :en New path: return cached values while the state key is unchanged
+    def cached_frame():
+        cache.get('info', (loaded_pyxres_file, scroll_x, scroll_y, selected[0], selected[1]), build_info)
+        cache.get('selected', (selected[0], selected[1], 0), build_selected)
+
+    uncached = measure(uncached_frame)
+    cached = measure(cached_frame)
+    report("labels", [
+        ("per-frame formatting", uncached, "us/frame"),
+        ("label cache", cached, "us/frame"),
+        ("speedup", uncached / cached, "x"),
+        ("cache misses", cache.misses, "builds"),
+    ])
+
+
+def make_sprites_document(count):
+    """
+    :jp 計測用のスプライト定義JSON文字列を生成します（_primary_と同じ15フィールド）
+    :en Generate a sprite definition JSON string for measurements (15 fields like _primary_)
+    """
+    template = {
+        "x": 0, "y": 0, "NAME": "SpriteName", "ACT_NAME": "ActionName", "ANIM_NUMBER": "Animation Number",
+    }
+    for i in range(1, 11):
+        template[f"ENPTY{i:02d}"] = "Reserved Field"
+    sprites = {"_primary_": template}
+    for i in range(count):
+        x, y = (i % 32) * 8, (i // 32) * 8
+        sprite = dict(template)
+        sprite.update({"x": x, "y": y, "NAME": f"GROUP{i % 50}", "ACT_NAME": "UNDEF"})
+        sprites[f"{x}_{y}"] = sprite
+    return json.dumps({"meta": {"sprite_size": 8}, "sprites": sprites})
+
+
+def traced_size(build):
+    """
+    :jp buildが返すオブジェクトが保持しているメモリ量（バイト）を返します
+    :en Return the memory (bytes) retained by the object build returns
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def bench_sprite_memory():
+    """
+    :jp スプライト表現のメモリ使用量: dict/スプライト と Spriteレコード の比較
+    :en Sprite representation memory: dict per sprite vs. Sprite records
+    """
+    rows = []
+    for count in (10000, 100000):
+        document = make_sprites_document(count)
+        dict_size = traced_size(lambda: json.loads(document)["sprites"])
+        record_size = traced_size(lambda: sprites_from_json(json.loads(document)["sprites"]))
+        rows.append((f"{count} sprites as dicts", dict_size / 1024 / 1024, "MiB"))
+        rows.append((f"{count} sprites as Sprite records", record_size / 1024 / 1024, "MiB"))
+        rows.append((f"{count} sprites reduction", dict_size / record_size, "x"))
+    report("sprite_memory", rows)
+
+
+def bench_file_format():
+    """
+    :jp 1ファイル形式: v3（"x_y" キーの辞書）/ v4（タイル番号順の行）と、それぞれの .json.gz の
+        サイズ・保存時間・読み込み時間
+    :en Single-file layout: size, save time and load time of v3 (dict keyed "x_y") and
+        v4 (rows by tile index), plain and as .json.gz
+    """
+    import sprite_storage
+
+    sprite_data = json.loads(make_sprites_document(10000))
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, version in (("v3", sprite_storage.KEYED_VERSION), ("v4", sprite_storage.COMPACT_VERSION)):
+            sprite_data["meta"]["version"] = version
+            json_path = os.path.join(tmp, f"{label}.json")
+            for store in (sprite_storage.JsonStore(json_path), sprite_storage.GzipJsonStore(json_path)):
+                name = os.path.basename(store.path)
+                save_ms = measure(lambda: store.save(sprite_data), 5) / 1000
+                rows.append((f"{name} size (10000 sprites)", os.path.getsize(store.path) / 1024, "KiB"))
+                rows.append((f"{name} save", save_ms, "ms"))
+                rows.append((f"{name} load", measure(store.load, 10) / 1000, "ms"))
+    report("file_format", rows)
+
+
+def bench_draw():
+    """
+    :jp 描画パス（スプライトシート/グリッド/ラベル/オーバーレイ）: ヘッドレスモードで1フレームあたりの時間
+    :en Draw path (sprite sheet / grid / labels / overlays): time per frame in headless mode
+    """
+    import bank_analysis
+    from SpriteDefiner import SpriteDefiner
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        # :jp 作業用コピーを使い、リポジトリのJSONを書き換えない
+        # :en Work on copies so the repository's JSON is never rewritten
+        pyxres_file = os.path.join(tmp, "my_resource.pyxres")
+        shutil.copy(os.path.join(here, "my_resource.pyxres"), pyxres_file)
+        shutil.copy(os.path.join(here, "sprites.json"), os.path.join(tmp, "my_resource.json"))
+
+        app = SpriteDefiner(headless=True)
+        app.load_pyxres_file(pyxres_file)
+        app.selected_tile_x, app.selected_tile_y = 40, 0
+
+        frames = 500
+        rows = [("draw (plain)", measure(app.draw, frames), "us/frame")]
+        if app.tile_usage_counts is not None:
+            app.show_usage_heatmap = True
+            rows.append(("draw (heatmap)", measure(app.draw, frames), "us/frame"))
+            app.show_usage_heatmap = False
+        if bank_analysis.available():
+            app.show_minimap = True
+            rows.append(("draw (minimap)", measure(app.draw, frames), "us/frame"))
+    report("draw", rows)
+
+
+def bench_similarity():
+    """
+    :jp 似ているタイルの検索: 特徴ベクトルの作成（全タイル）と1回の検索
+    :en Similar tile search: building the feature vectors (all tiles) and one query
+    """
+    import bank_analysis
+    import pyxres_reader
+    from tile_similarity import TileSimilarityIndex
+
+    if not bank_analysis.available():
+        print("[similarity]\n  skipped (NumPy is not installed)\n")
+        return
+    here = os.path.dirname(os.path.abspath(__file__))
+    pyxres_reader.load_resource(os.path.join(here, "my_resource.pyxres"))
+    pixels = bank_analysis.bank_pixels(pyxel.images[0])
+
+    def build():
+        index = TileSimilarityIndex()
+        index.sync(pixels)
+
+    index = TileSimilarityIndex()
+    index.sync(pixels)
+    rows = [
+        ("build index (1024 tiles)", measure(build, 200), "us"),
+        ("query top 8", measure(lambda: index.query(40, 0), 2000), "us"),
+    ]
+    report("similarity", rows)
+
+
+# :jp セクション名 -> 計測関数
+# :en Section name -> benchmark function
+SECTIONS = {
+    "labels": bench_labels,
+    "sprite_memory": bench_sprite_memory,
+    "file_format": bench_file_format,
+    "draw": bench_draw,
+    "similarity": bench_similarity,
+}
+
+
+def main(argv):
+    names = argv or list(SECTIONS)
+    for name in names:
+        if name not in SECTIONS:
+            print(f"Unknown section: {name} (available: {', '.join(SECTIONS)})")
+            return 1
+        SECTIONS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+"""
+dialog_events - Completion events for dialog controllers (published once per dialog)
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+from collections import deque
+
+
+class DialogEventQueue:
+    """
+    :jp ダイアログの完了イベントを1回だけ発行し、登録されたハンドラーに配送します。
+
+        コントローラーが完了コールバック（set_result_callback）を持っていればそれを使い、
+        持っていなければダイアログを開いた時だけ is_active() を監視して、
+        アクティブ→非アクティブになった瞬間に get_result() を1回だけ読みます
+    :en Publishes dialog completion events exactly once and delivers them to handlers.
+
+        Controllers that offer a completion callback (set_result_callback) push events
+        directly; otherwise is_active() is watched only while a dialog opened through
+        this queue is showing, and get_result() is read once on the active -> inactive edge
+    """
+
+    def __init__(self):
+        self.events = deque()
+        self.handlers = {}
+        # :jp 監視中のダイアログ: イベント名 -> コントローラー
+        # :en Dialogs being watched: event name -> controller
+        self.watching = {}
+        # :jp 完了コールバックで通知するイベント名
+        # :en Event names delivered through a completion callback
+        self.pushed = set()
+
+    def subscribe(self, name, handler):
+        """
+        :jp イベントのハンドラーを登録します（handler(result)）
+        :en Register a handler for an event (handler(result))
+        """
+        self.handlers.setdefault(name, []).append(handler)
+
+    def attach(self, name, controller):
+        """
+        :jp コントローラーをイベント名に結び付けます。完了コールバックに対応していれば登録します
+        :en Bind a controller to an event name, registering a completion callback when supported
+        """
+        if hasattr(controller, 'set_result_callback'):
+            controller.set_result_callback(lambda result: self.publish(name, result))
+            self.pushed.add(name)
+
+    def opened(self, name, controller):
+        """
+        :jp ダイアログを開いた直後に呼び出します（コールバック非対応なら監視を開始）
+        :en Call right after opening a dialog (starts watching if callbacks are unsupported)
+        """
+        if name not in self.pushed:
+            self.watching[name] = controller
+
+    def publish(self, name, result):
+        self.events.append((name, result))
+
+    def poll(self):
+        """
+        :jp 監視中のダイアログが閉じていれば完了イベントを発行します（監視中が無ければ何もしない）
+        :en Publish completion events for watched dialogs that have closed (no-op when none are watched)
+        """
+        if not self.watching:
+            return
+        for name, controller in list(self.watching.items()):
+            if not controller.is_active():
+                del self.watching[name]
+                self.publish(name, controller.get_result())
+
+    def dispatch(self):
+        """
+        :jp 溜まったイベントをハンドラーに配送します（ハンドラー内で発行されたイベントは次回に回す）
+        :en Deliver pending events to handlers (events published by handlers wait for the next call)
+        """
+        for _ in range(len(self.events)):
+            name, result = self.events.popleft()
+            for handler in self.handlers.get(name, ()):
+                handler(result)
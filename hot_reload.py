@@ -0,0 +1,219 @@
+"""
+hot_reload - Push sprite definition deltas from SpriteDefiner to running games (localhost only)
+
+Protocol: a TCP stream of JSON lines
+    {"type": "hello", "version": 1}
+    {"type": "put", "key": "8_0", "data": {...}}
+    {"type": "delete", "key": "8_0"}
+
+Game side:
+    from hot_reload import HotReloadClient
+    client = HotReloadClient(sprite_data["sprites"], port=8765)
+    ...
+    def update(self):
+        client.poll()     # applies pending deltas to the table, never blocks
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import json
+import time
+import socket
+import threading
+
+from sprite_model import sprite_json_default
+
+# :jp 既定のポート番号と、接続先（ローカルホストのみ）
+# :en Default port, and the only address used (localhost)
+DEFAULT_PORT = 8765
+LOCALHOST = "127.0.0.1"
+
+# :jp プロトコルのバージョン
+# :en Protocol version
+PROTOCOL_VERSION = 1
+
+# :jp 受信が追いつかないクライアントに溜めておく上限（バイト）。超えたら切断する
+# :en Bytes queued for a client that is not keeping up; beyond this it is dropped
+MAX_PENDING_BYTES = 1 << 20
+
+
+def encode_message(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':'), default=sprite_json_default) + "\n").encode('utf-8')
+
+
+class HotReloadServer:
+    """
+    :jp ローカルホストで接続を待ち受け、スプライトの変更を接続中のすべてのゲームに送ります。
+        送信は待たない（ノンブロッキング）ため、送り切れなかった分はクライアントごとに溜めて pump() で送ります
+    :en Listens on localhost and sends sprite changes to every connected game. Sends never wait
+        (non-blocking sockets); what could not be sent is queued per client and sent by pump()
+    """
+
+    def __init__(self, port=DEFAULT_PORT):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((LOCALHOST, port))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        # :jp クライアントのソケット -> 未送信のデータ
+        # :en Client socket -> bytes not sent yet
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._accept_loop, name="hot-reload", daemon=True)
+        self.thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            client.setblocking(False)
+            with self.lock:
+                self.clients[client] = bytearray(encode_message({"type": "hello", "version": PROTOCOL_VERSION}))
+                self._flush(client)
+
+    def _flush(self, client):
+        """
+        :jp 溜まっているデータを送れるだけ送ります（待たない）。切れた・溜まりすぎたクライアントは切断します。
+            self.lock を取得した状態で呼び出します
+        :en Send as much queued data as the socket takes (never waits). Clients that closed or fell too
+            far behind are dropped. Call with self.lock held
+        """
+        pending = self.clients[client]
+        while pending:
+            try:
+                sent = client.send(pending)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self._drop(client)
+                return
+            del pending[:sent]
+        if len(pending) > MAX_PENDING_BYTES:
+            print(f"Hot reload: dropped a client that is not reading ({len(pending)} bytes queued)")
+            self._drop(client)
+
+    def _drop(self, client):
+        client.close()
+        del self.clients[client]
+
+    def publish(self, op, key, data=None):
+        """
+        :jp 変更を1回だけシリアライズして全クライアントに送ります（待たない。送り切れない分は溜めて後で送る）
+        :en Serialize a change once and send it to every client (never waits; the rest is queued for later)
+        """
+        if not self.clients:
+            return
+        message = {"type": op, "key": key}
+        if data is not None:
+            message["data"] = data
+        payload = encode_message(message)
+        with self.lock:
+            for client in list(self.clients):
+                self.clients[client] += payload
+                self._flush(client)
+
+    def pump(self):
+        """
+        :jp 前回送り切れなかったデータを送ります（毎フレーム呼び出す。待たない）
+        :en Send data left over from earlier sends (call every frame; never waits)
+        """
+        if not self.clients:
+            return
+        with self.lock:
+            for client in list(self.clients):
+                if self.clients[client]:
+                    self._flush(client)
+
+    def close(self):
+        self.listener.close()
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients = {}
+
+
+class HotReloadClient:
+    """
+    :jp ゲーム側のクライアント。poll() で届いた変更をスプライト表（辞書）に適用します。
+        接続できない・切れた場合は一定間隔で再接続を試みます
+    :en Game-side client. poll() applies received changes to the sprite table (a dict).
+        It retries the connection periodically when the editor is not running
+    """
+
+    def __init__(self, sprites, port=DEFAULT_PORT, on_change=None, retry_interval=1.0):
+        self.sprites = sprites
+        self.port = port
+        self.on_change = on_change
+        self.retry_interval = retry_interval
+        self.sock = None
+        self.buffer = b""
+        self.next_attempt = 0.0
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self.next_attempt:
+            return False
+        self.next_attempt = now + self.retry_interval
+        try:
+            sock = socket.create_connection((LOCALHOST, self.port), timeout=0.05)
+        except OSError:
+            return False
+        sock.setblocking(False)
+        self.sock = sock
+        self.buffer = b""
+        return True
+
+    def _disconnect(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def poll(self):
+        """
+        :jp 届いている変更をすべて適用します（待たずに戻る）。戻り値は適用した変更の数です
+        :en Apply every change received so far (returns without waiting). Returns the number applied
+        """
+        if self.sock is None and not self._connect():
+            return 0
+
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self._disconnect()
+                break
+            if not chunk:
+                self._disconnect()
+                break
+            self.buffer += chunk
+
+        applied = 0
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            if line and self.apply(json.loads(line.decode('utf-8'))):
+                applied += 1
+        return applied
+
+    def apply(self, message):
+        """
+        :jp 1件の変更をスプライト表に適用します
+        :en Apply one change to the sprite table
+        """
+        op, key = message.get("type"), message.get("key")
+        if op == "put":
+            self.sprites[key] = message.get("data", {})
+        elif op == "delete":
+            self.sprites.pop(key, None)
+        else:
+            return False
+        if self.on_change is not None:
+            self.on_change(op, key, self.sprites.get(key))
+        return True
+
+    def close(self):
+        self._disconnect()
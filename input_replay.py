@@ -0,0 +1,170 @@
+"""
+input_replay - Input abstraction with session recording and uncapped replay
+
+Recording file format (JSON Lines):
+    {"version": 1, "width": 256, "height": 256}                 header
+    {"mouse": [x, y], "keys": [...], "events": [[name, result]]}  one line per frame
+    ("dialog": true marks frames where a dialog owned the input)
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import json
+import time
+
+import pyxel
+
+# :jp 記録ファイルの形式バージョン
+# :en Recording file format version
+RECORD_VERSION = 1
+
+
+class LiveInput:
+    """
+    :jp Pyxelの入力をそのまま返します（通常モード）
+    :en Returns Pyxel input as-is (normal mode)
+    """
+    replaying = False
+
+    def begin_frame(self, dialog_active):
+        pass
+
+    def btnp(self, key):
+        return pyxel.btnp(key)
+
+    @property
+    def mouse_x(self):
+        return pyxel.mouse_x
+
+    @property
+    def mouse_y(self):
+        return pyxel.mouse_y
+
+    def event(self, name, result):
+        pass
+
+    def close(self):
+        pass
+
+
+class RecordingInput(LiveInput):
+    """
+    :jp Pyxelの入力を返しつつ、フレームごとのマウス位置・押されたキー・ダイアログ結果を記録します
+    :en Returns Pyxel input while recording mouse position, pressed keys and dialog results per frame
+    """
+
+    def __init__(self, path, width, height):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write(json.dumps({"version": RECORD_VERSION, "width": width, "height": height}) + "\n")
+        self.frame = None
+        self.frame_count = 0
+
+    def flush(self):
+        if self.frame is not None:
+            self.file.write(json.dumps(self.frame, ensure_ascii=False, separators=(',', ':')) + "\n")
+            # :jp ウィンドウを閉じた時などはPythonの終了処理を通らないことがあるため、毎フレーム書き出す
+            # :en Closing the window may bypass Python's exit handlers, so write out every frame
+            self.file.flush()
+            self.frame_count += 1
+            self.frame = None
+
+    def begin_frame(self, dialog_active):
+        self.flush()
+        self.frame = {"mouse": [pyxel.mouse_x, pyxel.mouse_y]}
+        if dialog_active:
+            self.frame["dialog"] = True
+
+    def btnp(self, key):
+        pressed = pyxel.btnp(key)
+        if pressed and self.frame is not None:
+            keys = self.frame.setdefault("keys", [])
+            if key not in keys:
+                keys.append(key)
+        return pressed
+
+    def event(self, name, result):
+        """
+        :jp ダイアログの完了イベントを記録します（再生時はダイアログを開かずにこの結果を使う）
+        :en Record a dialog completion event (replay uses this result instead of opening the dialog)
+        """
+        if self.frame is not None:
+            self.frame.setdefault("events", []).append([name, result])
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+            print(f"Recorded {self.frame_count} frames to {self.path}")
+
+
+class ReplayInput(LiveInput):
+    """
+    :jp 記録ファイルのフレームを順に返します（next_frame で1フレーム進める）
+    :en Plays back frames from a recording (next_frame advances one frame)
+    """
+    replaying = True
+
+    def __init__(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        self.header = json.loads(lines[0]) if lines else {}
+        if self.header.get("version") != RECORD_VERSION:
+            raise ValueError(f"Unsupported recording version: {self.header.get('version')}")
+        self.frames = [json.loads(line) for line in lines[1:]]
+        self.frame = {}
+
+    def next_frame(self, frame):
+        self.frame = frame
+
+    def btnp(self, key):
+        return key in self.frame.get("keys", ())
+
+    @property
+    def mouse_x(self):
+        return self.frame.get("mouse", (0, 0))[0]
+
+    @property
+    def mouse_y(self):
+        return self.frame.get("mouse", (0, 0))[1]
+
+
+def replay_session(app, replay_input):
+    """
+    :jp 記録したセッションを待ち時間無しで update()/draw() に流し、フレームごとの時間（ms）を返します。
+        ダイアログが入力を持っていたフレームは、記録したダイアログ結果の配送だけを行います
+    :en Feed a recorded session through update()/draw() without frame pacing and return per-frame
+        times (ms). Frames where a dialog owned the input only deliver the recorded dialog results
+    """
+    timings = []
+    for frame in replay_input.frames:
+        replay_input.next_frame(frame)
+        start = time.perf_counter()
+        for name, result in frame.get("events", ()):
+            app.dialog_events.publish(name, result)
+        if frame.get("dialog"):
+            app.process_dialog_events()
+        else:
+            app.update()
+        app.draw()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report_timings(timings, slowest=5):
+    """
+    :jp フレーム時間の統計（平均・中央値・95パーセンタイル・最大）と遅いフレームを出力します
+    :en Print frame time statistics (mean / median / p95 / max) and the slowest frames
+    """
+    if not timings:
+        print("No frames to replay")
+        return
+    ordered = sorted(timings)
+    count = len(ordered)
+    print(f"[replay] frames: {count}  total: {sum(ordered):.1f} ms")
+    print(f"[replay] mean: {sum(ordered) / count:.3f} ms  median: {ordered[count // 2]:.3f} ms  "
+          f"p95: {ordered[min(count - 1, int(count * 0.95))]:.3f} ms  max: {ordered[-1]:.3f} ms")
+    worst = sorted(range(count), key=timings.__getitem__, reverse=True)[:slowest]
+    print("[replay] slowest frames: " + ", ".join(f"#{i} {timings[i]:.3f} ms" for i in worst))
@@ -0,0 +1,63 @@
+"""
+LabelCache - State keyed cache for status line text
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import pyxel
+
+
+class LabelCache:
+    """
+    :jp 状態キーが変わった時だけラベル文字列を再構築するキャッシュ
+    :en Cache that rebuilds label text only when its state key changes
+    """
+
+    def __init__(self):
+        # :jp ラベル名 -> (状態キー, 値)
+        # :en Label name -> (state key, value)
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, state, build):
+        """
+        :jp ラベル文字列とピクセル幅を取得します。stateが前回と同じならキャッシュを返します
+        :en Get label text and its pixel width; returns the cached value if state is unchanged
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == state:
+            self.hits += 1
+            return entry[1]
+
+        text = build()
+        value = (text, len(text) * pyxel.FONT_WIDTH)
+        self._entries[name] = (state, value)
+        self.misses += 1
+        return value
+
+    def get_lines(self, name, state, build):
+        """
+        :jp 複数行のラベル（文字列のタプル）をキャッシュして取得します
+        :en Get a cached multi-line label (tuple of strings)
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == state:
+            self.hits += 1
+            return entry[1]
+
+        lines = tuple(build())
+        self._entries[name] = (state, lines)
+        self.misses += 1
+        return lines
+
+    def invalidate(self, name=None):
+        """
+        :jp 指定ラベル（省略時は全て）のキャッシュを破棄します
+        :en Drop the cached entry for a label (all labels when omitted)
+        """
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
@@ -0,0 +1,137 @@
+"""
+palette_swap - Palette-swapped sprite variants (color LUT) with an LRU cache
+
+Palettes are defined in meta.palettes as {name: {"src color": dst color}}, e.g.
+    "palettes": {"RED": {"12": 8, "6": 2}}
+and referenced from sprite fields whose name starts with "PAL" (a palette name,
+or an inline remap such as "12:8,6:2").
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+from collections import OrderedDict
+
+import pyxel
+
+import bank_analysis
+
+# :jp 既定のキャッシュ件数（8x8の画像なので小さい）
+# :en Default number of cached variants (8x8 images, so each is small)
+DEFAULT_CAPACITY = 256
+
+# :jp パレット指定を持つフィールド名の接頭辞
+# :en Prefix of sprite fields holding palette references
+PALETTE_FIELD_PREFIX = "PAL"
+
+# :jp Pyxelのパレット色数
+# :en Number of colors in the Pyxel palette
+COLOR_COUNT = 16
+
+
+def parse_remap(spec):
+    """
+    :jp インライン指定 "12:8,6:2"（区切りは , または空白、: の代わりに > も可）を {元色: 先色} に変換します。
+        解釈できなければ None を返します
+    :en Parse an inline remap "12:8,6:2" (separated by , or spaces; > works like :) into
+        {src: dst}. Returns None if it cannot be parsed
+    """
+    mapping = {}
+    for item in spec.replace(',', ' ').split():
+        src, sep, dst = item.replace('>', ':').partition(':')
+        if not sep:
+            return None
+        try:
+            src, dst = int(src), int(dst)
+        except ValueError:
+            return None
+        if not (0 <= src < COLOR_COUNT and 0 <= dst < COLOR_COUNT):
+            return None
+        mapping[src] = dst
+    return mapping or None
+
+
+def palette_lut(mapping):
+    """
+    :jp {元色: 先色} から16色の変換表（バイト列, キャッシュキーにも使う）を作ります
+    :en Build a 16-entry color lookup table (bytes, also used as the cache key) from {src: dst}
+    """
+    lut = bytearray(range(COLOR_COUNT))
+    for src, dst in mapping.items():
+        try:
+            src, dst = int(src), int(dst)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= src < COLOR_COUNT and 0 <= dst < COLOR_COUNT:
+            lut[src] = dst
+    return bytes(lut)
+
+
+def sprite_palettes(sprite, palettes):
+    """
+    :jp スプライトに適用するパレットの一覧 [(名前, 変換表), ...] を返します。
+        PAL で始まるフィールドの指定を優先し、無ければ meta.palettes のすべてを返します
+    :en Return the palettes to preview for a sprite as [(name, lut), ...]. References in
+        fields starting with PAL come first; without any, every meta.palettes entry is used
+    """
+    result = []
+    seen = set()
+    for field, value in (sprite or {}).items():
+        if not field.startswith(PALETTE_FIELD_PREFIX) or not isinstance(value, str):
+            continue
+        if value in palettes:
+            name, mapping = value, palettes[value]
+        else:
+            name, mapping = value, parse_remap(value)
+        if isinstance(mapping, dict) and mapping and name not in seen:
+            seen.add(name)
+            result.append((name, palette_lut(mapping)))
+    if not result:
+        result = [(name, palette_lut(mapping)) for name, mapping in palettes.items()
+                  if isinstance(mapping, dict) and mapping]
+    return result
+
+
+class PaletteVariantCache:
+    """
+    :jp パレット変換したタイル画像を (タイル, 変換表) をキーにLRU順で保持します
+    :en Keeps palette-swapped tile images in LRU order, keyed by (tile, lookup table)
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.bank_digest = None
+        self.hits = 0
+        self.misses = 0
+
+    def sync(self, pixels):
+        """
+        :jp イメージバンクの画素が変わっていればキャッシュを破棄します
+        :en Drop the cache if the image bank pixels changed
+        """
+        digest = bank_analysis.bank_digest(pixels)
+        if digest != self.bank_digest:
+            self.entries.clear()
+            self.bank_digest = digest
+
+    def get(self, pixels, tile_x, tile_y, lut, size=8):
+        """
+        :jp 変換済みのタイル画像を返します（無ければ変換表をタイル全体に一括適用して作成）
+        :en Return the recolored tile image (created by applying the LUT to the whole tile at once)
+        """
+        key = (tile_x, tile_y, size, lut)
+        image = self.entries.get(key)
+        if image is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        tile = pixels[tile_y:tile_y + size, tile_x:tile_x + size]
+        image = pyxel.Image(size, size)
+        bank_analysis.bank_pixels(image)[:tile.shape[0], :tile.shape[1]] = bank_analysis.recolor(tile, lut)
+        self.entries[key] = image
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return image
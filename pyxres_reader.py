@@ -0,0 +1,73 @@
+"""
+pyxres_reader - Read .pyxres resource files without a Pyxel window (headless mode)
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import zipfile
+
+import pyxel
+
+# :jp tomllibはPython 3.11以降の標準ライブラリ（それ以前はtomliで代用）
+# :en tomllib is in the standard library from Python 3.11 (tomli is used before that)
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# :jp pyxresファイル内のリソース定義ファイル名
+# :en Name of the resource definition inside a pyxres file
+RESOURCE_TOML = "pyxel_resource.toml"
+
+
+def read_resource(path):
+    """
+    :jp pyxresファイルを読み込み、リソース定義（images / tilemaps / colors など）の辞書を返します
+    :en Read a pyxres file and return the resource definition dict (images / tilemaps / colors, ...)
+    """
+    if tomllib is None:
+        raise RuntimeError("Headless loading needs Python 3.11+ or tomli (pip install tomli)")
+    with zipfile.ZipFile(path) as archive:
+        text = archive.read(RESOURCE_TOML).decode('utf-8')
+    return tomllib.loads(text)
+
+
+def _copy_rows(target, target_width, target_height, rows, values_per_cell=1):
+    """
+    :jp 行ごとのデータをバッファに書き込みます（保存時に省略された末尾の0はそのまま0として扱う）
+    :en Copy row data into a buffer (trailing zeros trimmed on save stay zero)
+    """
+    stride = target_width * values_per_cell
+    for y, row in enumerate(rows[:target_height]):
+        row = row[:stride]
+        offset = y * stride
+        target[offset:offset + len(row)] = row
+
+
+def load_resource(path):
+    """
+    :jp pyxel.load の代わりに、ウィンドウ無しでイメージバンク・タイルマップ・パレットへ読み込みます
+    :en Load image banks, tilemaps and palette without a window (replacement for pyxel.load)
+    """
+    resource = read_resource(path)
+
+    for image, data in zip(pyxel.images, resource.get("images", [])):
+        buffer = image.data_ptr()
+        buffer[:] = bytes(len(buffer))
+        _copy_rows(buffer, image.width, image.height, data.get("data", []))
+
+    for tilemap, data in zip(pyxel.tilemaps, resource.get("tilemaps", [])):
+        buffer = tilemap.data_ptr()
+        buffer[:] = [0] * len(buffer)
+        _copy_rows(buffer, tilemap.width, tilemap.height, data.get("data", []), values_per_cell=2)
+        if isinstance(data.get("imgsrc"), int):
+            tilemap.imgsrc = data["imgsrc"]
+
+    colors = resource.get("colors")
+    if colors:
+        pyxel.colors[:] = colors
+    return resource
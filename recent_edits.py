@@ -0,0 +1,69 @@
+"""
+recent_edits - Most-recently-edited sprites (O(1) touch / evict), persisted in meta.recent_edits
+
+meta.recent_edits holds [key, x, y, NAME] entries, oldest first.
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+from collections import OrderedDict
+
+# :jp 保持する件数
+# :en Number of entries kept
+DEFAULT_CAPACITY = 16
+
+
+class RecentEdits:
+    """
+    :jp 最近編集したスプライトをキー -> (x, y, NAME) の順序付き辞書で保持します（末尾が最新）
+    :en Keeps recently edited sprites in an ordered dict of key -> (x, y, NAME) (newest last)
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def touch(self, key, x, y, name=""):
+        """
+        :jp スプライトを最新として記録し、上限を超えた最も古いものを捨てます
+        :en Record a sprite as the newest and evict the oldest beyond the capacity
+        """
+        self.entries[key] = (x, y, name)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def newest(self, count):
+        """
+        :jp 新しい順に最大 count 件の (キー, x, y, NAME) を返します
+        :en Return up to count (key, x, y, NAME) entries, newest first
+        """
+        result = []
+        for key in reversed(self.entries):
+            if len(result) >= count:
+                break
+            result.append((key,) + self.entries[key])
+        return result
+
+    def to_json(self):
+        return [[key, x, y, name] for key, (x, y, name) in self.entries.items()]
+
+    @classmethod
+    def from_json(cls, data, capacity=DEFAULT_CAPACITY):
+        """
+        :jp meta.recent_edits から復元します（壊れたエントリは読み飛ばす）
+        :en Restore from meta.recent_edits (malformed entries are skipped)
+        """
+        recent = cls(capacity)
+        for entry in data or ():
+            if isinstance(entry, list) and len(entry) >= 3:
+                name = entry[3] if len(entry) > 3 else ""
+                try:
+                    recent.touch(str(entry[0]), int(entry[1]), int(entry[2]), name)
+                except (TypeError, ValueError):
+                    continue
+        return recent
+
+    def __len__(self):
+        return len(self.entries)
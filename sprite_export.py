@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+sprite_export - Columnar export of the sprite table (CSV / NumPy .npz)
+
+Usage:
+    python sprite_export.py sprites.json --csv sprites.csv --npz sprites.npz
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import sys
+import csv
+import argparse
+
+from sprite_model import PRIMARY_KEY
+import sprite_storage
+
+# :jp NumPyは.npz出力時のみ必要
+# :en NumPy is only required for .npz output
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class SpriteColumns:
+    """
+    :jp スプライト表を列ごとに保持します（1フィールド = 1列）
+    :en Holds the sprite table column by column (one column per field)
+    """
+
+    def __init__(self):
+        # :jp 列名 -> 値のリスト（値が無い行は None）
+        # :en Column name -> list of values (None where a row has no value)
+        self.columns = {"key": [], "x": [], "y": []}
+        # :jp 列名 -> {文字列値: カテゴリコード}
+        # :en Column name -> {string value: category code}
+        self.categories = {}
+        self.row_count = 0
+
+    def append(self, key, sprite):
+        """
+        :jp 1スプライト分の値を各列に追加します
+        :en Append the values of one sprite to every column
+        """
+        row = self.row_count
+        self.columns["key"].append(key)
+        for name, value in sprite.items():
+            column = self.columns.get(name)
+            if column is None:
+                # :jp 途中で現れた列は、それまでの行を None で埋める
+                # :en Columns that first appear mid-way are back-filled with None
+                column = self.columns[name] = [None] * row
+            column.append(value)
+            if isinstance(value, str):
+                codes = self.categories.setdefault(name, {})
+                if value not in codes:
+                    codes[value] = len(codes)
+        self.row_count = row + 1
+        for column in self.columns.values():
+            if len(column) < self.row_count:
+                column.append(None)
+
+
+def collect_columns(sprites):
+    """
+    :jp sprite_data["sprites"] を1回走査して列データを作成します（_primary_は除く）
+    :en Build column data in a single pass over sprite_data["sprites"] (excluding _primary_)
+    """
+    table = SpriteColumns()
+    for key, sprite in sprites.items():
+        if key == PRIMARY_KEY:
+            continue
+        table.append(key, sprite)
+    return table
+
+
+def write_csv(table, csv_path):
+    """
+    :jp 列データをCSVに書き出します（値が無いセルは空）
+    :en Write column data to CSV (cells without a value are empty)
+    """
+    names = list(table.columns)
+    columns = [table.columns[name] for name in names]
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for row in zip(*columns):
+            writer.writerow(["" if value is None else value for value in row])
+
+
+def _column_kind(values):
+    """
+    :jp 列の型を判定します: "int" / "float" / "category"
+    :en Determine the column kind: "int" / "float" / "category"
+    """
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return "category"
+        if isinstance(value, float):
+            kind = "float"
+        elif kind is None:
+            kind = "int"
+    return kind or "category"
+
+
+def write_npz(table, npz_path):
+    """
+    :jp 列データを.npzに書き出します。文字列列はカテゴリコード（int32, 欠損は-1）と
+        "<列名>__categories" に、欠損のある整数列は "<列名>__present" マスク付きで保存します
+    :en Write column data to .npz. String columns are stored as category codes
+        (int32, -1 when missing) plus "<name>__categories"; integer columns with
+        gaps get a "<name>__present" mask
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for .npz export (pip install numpy)")
+
+    arrays = {}
+    for name, values in table.columns.items():
+        kind = _column_kind(values)
+        if kind == "int":
+            present = np.array([value is not None for value in values], dtype=bool)
+            arrays[name] = np.array([0 if value is None else value for value in values], dtype=np.int64)
+            if not present.all():
+                arrays[f"{name}__present"] = present
+        elif kind == "float":
+            arrays[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        else:
+            codes = table.categories.setdefault(name, {})
+            column_codes = []
+            for value in values:
+                if value is None:
+                    column_codes.append(-1)
+                    continue
+                value = value if isinstance(value, str) else str(value)
+                if value not in codes:
+                    codes[value] = len(codes)
+                column_codes.append(codes[value])
+            arrays[name] = np.array(column_codes, dtype=np.int32)
+            arrays[f"{name}__categories"] = np.array(list(codes), dtype=str)
+    np.savez(npz_path, **arrays)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the sprite table as columns (CSV / NPZ)")
+    parser.add_argument('json_file', help="sprite definition JSON")
+    parser.add_argument('--csv', dest='csv_path', help="write CSV to this path")
+    parser.add_argument('--npz', dest='npz_path', help="write NumPy .npz to this path")
+    args = parser.parse_args(argv)
+
+    if not args.csv_path and not args.npz_path:
+        parser.error("specify --csv and/or --npz")
+
+    # :jp どの保存形式（1ファイル v3/v4・.json.gz・シャード形式・SQLite）でも同じ手順で読み込み、
+    #     遅延読み込みのスプライトはすべて読み込んだ辞書にする
+    # :en Read any store (single file v3/v4, .json.gz, sharded, SQLite) the same way and
+    #     materialize lazily loaded sprites into plain dicts
+    store = sprite_storage.open_store(args.json_file)
+    if not store.exists():
+        print(f"{args.json_file}: not found")
+        return 1
+    sprite_data = sprite_storage.materialize(store.load())
+
+    table = collect_columns(sprite_data.get("sprites", {}))
+    if args.csv_path:
+        write_csv(table, args.csv_path)
+        print(f"Exported {table.row_count} sprites to {args.csv_path}")
+    if args.npz_path:
+        write_npz(table, args.npz_path)
+        print(f"Exported {table.row_count} sprites to {args.npz_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+sprite_model - Compact sprite records shared by SpriteDefiner and tools
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+from collections.abc import MutableMapping
+
+# :jp テンプレート（フィールド定義）用の特殊キー
+# :en Special key of the template (field definitions)
+PRIMARY_KEY = "_primary_"
+
+# :jp 値が設定されていないフィールドを表す番兵
+# :en Sentinel for fields that have no value
+_MISSING = object()
+
+# :jp 真偽値として受け付ける文字列
+# :en Strings accepted as boolean values
+_BOOL_STRINGS = {
+    "true": True, "yes": True, "on": True, "1": True,
+    "false": False, "no": False, "off": False, "0": False,
+}
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    key = str(value).strip().lower()
+    if key not in _BOOL_STRINGS:
+        raise ValueError(f"not a boolean: {value!r}")
+    return _BOOL_STRINGS[key]
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError(f"not an integer: {value!r}")
+    if isinstance(value, int):
+        return value
+    return int(str(value).strip())
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip())
+
+
+# :jp meta.field_types で宣言できる型と変換関数
+# :en Types that meta.field_types may declare, and their converters
+FIELD_TYPES = {
+    "str": str,
+    "int": _to_int,
+    "float": _to_float,
+    "bool": _to_bool,
+}
+
+
+class FieldSchema:
+    """
+    :jp フィールド名と格納位置の対応表。同じ定義ファイルの全スプライトで共有します
+    :en Field name to slot index table, shared by every sprite of one definition file
+    """
+
+    __slots__ = ('names', 'index', 'pool', 'types', 'placeholders')
+
+    def __init__(self, names=(), types=None, placeholders=None):
+        self.names = []
+        self.index = {}
+        # :jp フィールド名 -> 型名（meta.field_types）
+        # :en Field name -> type name (meta.field_types)
+        self.types = {}
+        # :jp フィールド名 -> _primary_ の初期値（変換できない場合は未入力としてそのまま残す）
+        # :en Field name -> _primary_ default value (kept as-is, as unset, when it does not convert)
+        self.placeholders = dict(placeholders or {})
+        # :jp 文字列値の共有プール（"Reserved Field" などの重複を1つにまとめる）
+        # :en Shared pool of string values (collapses duplicates such as "Reserved Field")
+        self.pool = {}
+        for name in names:
+            self.add(name)
+        for name, type_name in (types or {}).items():
+            if type_name not in FIELD_TYPES:
+                # :jp 未知の型は文字列として扱う（読み込み自体は失敗させない）
+                # :en Unknown types are treated as strings (loading itself must not fail)
+                print(f"Warning: unknown field type for {name}: {type_name}")
+                continue
+            self.types[name] = type_name
+
+    def add(self, name):
+        """
+        :jp フィールドを登録して格納位置を返します（登録済みなら既存の位置）
+        :en Register a field and return its slot index (existing index if already known)
+        """
+        idx = self.index.get(name)
+        if idx is None:
+            idx = len(self.names)
+            self.names.append(name)
+            self.index[name] = idx
+        return idx
+
+    def share(self, value):
+        """
+        :jp 文字列値をプール内の同一オブジェクトに置き換えます
+        :en Replace a string value with the pooled instance
+        """
+        if isinstance(value, str):
+            return self.pool.setdefault(value, value)
+        return value
+
+    def convert(self, name, value):
+        """
+        :jp 宣言された型に値を変換します。変換できない場合はValueErrorを送出します
+            （_primary_ の初期値と同じ値は、変換できない時だけ未入力としてそのまま返す）
+        :en Convert a value to its declared type; raises ValueError if it cannot
+            (a value equal to the _primary_ default is returned as-is, as unset, only when it does not convert)
+        """
+        type_name = self.types.get(name)
+        if type_name is None or value == "":
+            return value
+        try:
+            return FIELD_TYPES[type_name](value)
+        except (TypeError, ValueError):
+            if value == self.placeholders.get(name, _MISSING):
+                return value
+            raise
+
+    def validate(self, data):
+        """
+        :jp 辞書の全フィールドを型変換します
+        :en Convert every field of a dict to its declared type
+
+        :jp 戻り値は (変換後の辞書, エラーメッセージのリスト) です
+        :en Returns (converted dict, list of error messages)
+        """
+        converted = {}
+        errors = []
+        for key, value in data.items():
+            try:
+                converted[key] = self.convert(key, value)
+            except (TypeError, ValueError):
+                errors.append(f"{key} must be {self.types[key]} (got {value!r})")
+        return converted, errors
+
+    @classmethod
+    def from_template(cls, template, types=None):
+        """
+        :jp _primary_ のキー（x, y以外）からスキーマを作成します
+        :en Build a schema from the _primary_ keys (excluding x, y)
+        """
+        fields = {key: value for key, value in template.items() if key not in ("x", "y")}
+        return cls(fields, types, fields)
+
+
+class Sprite(MutableMapping):
+    """
+    :jp 1スプライト分のレコード。x, yは固定スロット、その他のフィールドは
+        スキーマの順序に並んだリストに格納します（dictと同じ操作が可能）
+    :en A single sprite record. x and y are fixed slots; other fields live in a
+        list ordered by the shared schema (supports the same operations as a dict)
+    """
+
+    __slots__ = ('x', 'y', 'schema', 'values')
+
+    def __init__(self, x, y, schema, values=None):
+        self.x = x
+        self.y = y
+        self.schema = schema
+        self.values = values if values is not None else []
+
+    @classmethod
+    def from_json(cls, data, schema):
+        """
+        :jp JSONの辞書からレコードを作成します（未知のフィールドはスキーマに追加）
+        :en Create a record from a JSON dict (unknown fields are added to the schema)
+        """
+        values = [_MISSING] * len(schema.names)
+        for key, value in data.items():
+            if key == "x" or key == "y":
+                continue
+            idx = schema.add(key)
+            if idx >= len(values):
+                values.extend([_MISSING] * (idx + 1 - len(values)))
+            try:
+                value = schema.convert(key, value)
+            except (TypeError, ValueError):
+                # :jp 変換できない既存値はそのまま残す（編集時に検証される）
+                # :en Keep existing values that do not convert (validated on edit)
+                pass
+            values[idx] = schema.share(value)
+        return cls(data.get("x", 0), data.get("y", 0), schema, values)
+
+    def to_json(self):
+        """
+        :jp JSON保存用の辞書に変換します
+        :en Convert to a dict for JSON output
+        """
+        data = {"x": self.x, "y": self.y}
+        names = self.schema.names
+        for idx, value in enumerate(self.values):
+            if value is not _MISSING:
+                data[names[idx]] = value
+        return data
+
+    def __getitem__(self, key):
+        if key == "x":
+            return self.x
+        if key == "y":
+            return self.y
+        idx = self.schema.index.get(key)
+        if idx is None or idx >= len(self.values) or self.values[idx] is _MISSING:
+            raise KeyError(key)
+        return self.values[idx]
+
+    def __setitem__(self, key, value):
+        if key == "x":
+            self.x = value
+        elif key == "y":
+            self.y = value
+        else:
+            idx = self.schema.add(key)
+            if idx >= len(self.values):
+                self.values.extend([_MISSING] * (idx + 1 - len(self.values)))
+            self.values[idx] = self.schema.share(value)
+
+    def __delitem__(self, key):
+        if key in ("x", "y"):
+            raise KeyError(f"{key} cannot be removed")
+        idx = self.schema.index.get(key)
+        if idx is None or idx >= len(self.values) or self.values[idx] is _MISSING:
+            raise KeyError(key)
+        self.values[idx] = _MISSING
+
+    def __iter__(self):
+        yield "x"
+        yield "y"
+        names = self.schema.names
+        for idx, value in enumerate(self.values):
+            if value is not _MISSING:
+                yield names[idx]
+
+    def __len__(self):
+        return 2 + sum(1 for value in self.values if value is not _MISSING)
+
+    def copy(self):
+        return Sprite(self.x, self.y, self.schema, list(self.values))
+
+    def __repr__(self):
+        return repr(self.to_json())
+
+
+def sprites_from_json(raw_sprites, field_types=None):
+    """
+    :jp JSONの "sprites" 辞書をレコードに変換します。_primary_ は辞書のまま残します。
+        field_types（meta.field_types）で宣言されたフィールドはここで一度だけ型変換します
+    :en Convert the JSON "sprites" dict into records; _primary_ stays a plain dict.
+        Fields declared in field_types (meta.field_types) are converted once here
+
+    :jp 戻り値は (sprites, schema) のタプルです
+    :en Returns a (sprites, schema) tuple
+    """
+    template = raw_sprites.get(PRIMARY_KEY, {})
+    schema = FieldSchema.from_template(template, field_types)
+    sprites = {}
+    for key, data in raw_sprites.items():
+        if key == PRIMARY_KEY or isinstance(data, Sprite):
+            sprites[key] = data
+        else:
+            sprites[key] = Sprite.from_json(data, schema)
+    return sprites, schema
+
+
+def sprite_json_default(obj):
+    """
+    :jp json.dump の default 引数用。Spriteを辞書に変換します
+    :en For json.dump's default argument; converts Sprite records to dicts
+    """
+    if isinstance(obj, Sprite):
+        return obj.to_json()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
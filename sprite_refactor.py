@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+sprite_refactor - Bulk find-and-replace over sprite fields (one write per file)
+
+Usage:
+    python sprite_refactor.py my_resource.json --field NAME --find PBULLET --replace PLAYER_SHOT
+    python sprite_refactor.py a.json b.json --field ACT_NAME --regex --find '^SHOT(\\d)$' --replace 'FIRE\\1'
+    python sprite_refactor.py *.json --field '*' --find OLD --replace NEW --dry-run
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import re
+import sys
+import argparse
+
+import sprite_storage
+from sprite_model import PRIMARY_KEY
+from sprite_wal import WriteAheadLog
+
+# :jp すべての文字列フィールドを対象にする指定
+# :en Field selector matching every string field
+ALL_FIELDS = "*"
+
+# :jp 置換しないフィールド（座標）
+# :en Fields never rewritten (coordinates)
+FIXED_FIELDS = frozenset(["x", "y"])
+
+# :jp プレビューで表示する変更の件数
+# :en Number of changes shown in the preview
+PREVIEW_LINES = 10
+
+
+def make_replacer(find, replace, regex=False, whole=False, ignore_case=False):
+    """
+    :jp 文字列を置換する関数を作ります（一致しなければ None を返す）
+    :en Build a function that rewrites a string (returns None when nothing matches)
+    """
+    pattern = find if regex else re.escape(find)
+    if whole:
+        pattern = f"(?:{pattern})\\Z"
+    compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    # :jp リテラル指定では置換文字列の \ をそのまま使う
+    # :en Literal mode uses backslashes in the replacement as-is
+    template = replace if regex else (lambda match: replace)
+    search = compiled.match if whole else compiled.search
+
+    def replacer(value):
+        if not isinstance(value, str) or not search(value):
+            return None
+        if whole:
+            return compiled.sub(template, value, count=1)
+        return compiled.sub(template, value)
+    return replacer
+
+
+def candidate_keys(sprites, field, replacer):
+    """
+    :jp 置換対象になり得るスプライトのキーを返します。NAME はシャード形式・SQLiteのインデックス、
+        ACT_NAME はSQLiteの列から絞り込み、一致しないスプライトは読み込みません
+    :en Return the keys of sprites that may match. NAME is narrowed with the sharded / SQLite
+        index and ACT_NAME with the SQLite column, so sprites that cannot match are never loaded
+    """
+    if field == "NAME" and hasattr(sprites, 'tiles'):
+        return [key for key, name in sprites.tiles.items() if replacer(name) is not None]
+    if field == "ACT_NAME" and hasattr(sprites, 'connection'):
+        rows = sprites.connection.execute("SELECT key, act_name FROM sprites")
+        keys = [key for key, act_name in rows if replacer(act_name) is not None]
+        # :jp 読み込み済み（未保存の変更がある可能性）の行も確認する
+        # :en Also check rows already loaded (they may hold unsaved changes)
+        return sorted(set(keys) | set(sprites.loaded))
+    return [key for key in sprites if key != PRIMARY_KEY]
+
+
+def refactor_sprites(sprites, fields, replacer):
+    """
+    :jp スプライト表の指定フィールドを置換し、変更の一覧 [(キー, フィールド, 旧値, 新値), ...] を返します
+    :en Rewrite the given fields of the sprite table and return the changes as
+        [(key, field, old, new), ...]
+    """
+    if ALL_FIELDS in fields:
+        keys = [key for key in sprites if key != PRIMARY_KEY]
+    else:
+        keys = set()
+        for field in fields:
+            keys.update(candidate_keys(sprites, field, replacer))
+        keys = sorted(keys)
+
+    changes = []
+    for key in keys:
+        sprite = sprites[key]
+        names = [name for name in sprite if name not in FIXED_FIELDS] if ALL_FIELDS in fields else fields
+        updated = None
+        for name in names:
+            if name in FIXED_FIELDS:
+                continue
+            old = sprite.get(name)
+            new = replacer(old)
+            if new is None or new == old:
+                continue
+            if updated is None:
+                updated = dict(sprite)
+            updated[name] = new
+            changes.append((key, name, old, new))
+        if updated is not None:
+            # :jp 代入し直して、シャード・インデックスのNAMEグループも更新する
+            # :en Assign back so sharded / SQLite NAME groups are updated too
+            sprites[key] = updated
+    return changes
+
+
+def refactor_file(json_path, fields, replacer, dry_run=False):
+    """
+    :jp 1つのスプライト定義を読み込んで置換し、変更があれば保存先に1回だけ書き込みます
+    :en Load one sprite definition, rewrite it, and write it to its store once if anything changed
+    """
+    store = sprite_storage.open_store(json_path)
+    if not store.exists():
+        print(f"{json_path}: not found")
+        return None
+    if WriteAheadLog(store.path, store.modified_ns).pending():
+        print(f"{json_path}: skipped (unsaved edits in the edit log; open it in SpriteDefiner first)")
+        return None
+
+    sprite_data = store.load()
+    changes = refactor_sprites(sprite_data["sprites"], fields, replacer)
+    sprite_count = len(set(key for key, _, _, _ in changes))
+    print(f"{json_path} ({store.kind}): {len(changes)} replacements in {sprite_count} sprites")
+    for key, field, old, new in changes[:PREVIEW_LINES]:
+        print(f"  {key:<10} {field}: {old!r} -> {new!r}")
+    if len(changes) > PREVIEW_LINES:
+        print(f"  ... and {len(changes) - PREVIEW_LINES} more")
+
+    if changes and not dry_run:
+        store.save(sprite_data)
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find and replace values across sprite fields")
+    parser.add_argument('json_files', nargs='+', help="sprite definition JSON files (any storage layout)")
+    parser.add_argument('--field', action='append', required=True,
+                        help=f"field to rewrite (repeatable; '{ALL_FIELDS}' for every string field)")
+    parser.add_argument('--find', required=True, help="text (or pattern with --regex) to find")
+    parser.add_argument('--replace', required=True, help="replacement (group references allowed with --regex)")
+    parser.add_argument('--regex', action='store_true', help="treat --find as a regular expression")
+    parser.add_argument('--whole', action='store_true', help="only match whole field values")
+    parser.add_argument('--ignore-case', action='store_true', help="case-insensitive matching")
+    parser.add_argument('--dry-run', action='store_true', help="preview the changes without writing")
+    args = parser.parse_args(argv)
+
+    try:
+        replacer = make_replacer(args.find, args.replace, args.regex, args.whole, args.ignore_case)
+    except re.error as e:
+        parser.error(f"invalid pattern: {e}")
+
+    total = 0
+    for json_path in args.json_files:
+        changes = refactor_file(json_path, args.field, replacer, args.dry_run)
+        total += len(changes or ())
+    print(f"{'Would replace' if args.dry_run else 'Replaced'} {total} values in {len(args.json_files)} files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,949 @@
+#!/usr/bin/env python3
+"""
+sprite_storage - Sprite definition stores: single JSON, sharded JSON, SQLite
+
+Layouts (next to the pyxres file):
+    my_resource.json                    single file (default; meta.version 4 = compact tile-index rows)
+    my_resource.json.gz                 single file, gzip-compressed
+    my_resource.sprites/index.json      sharded: meta, _primary_, collision, tile -> group map
+    my_resource.sprites/<NAME>.json     sharded: sprites of one NAME group
+    my_resource.sqlite                  SQLite: sprites table indexed on position and NAME/ACT_NAME
+
+Usage:
+    python sprite_storage.py split my_resource.json         # single JSON -> sharded
+    python sprite_storage.py join my_resource.json          # sharded -> single JSON
+    python sprite_storage.py to-sqlite my_resource.json     # single JSON -> SQLite
+    python sprite_storage.py from-sqlite my_resource.json   # SQLite -> single JSON
+    python sprite_storage.py compact my_resource.json       # single JSON -> compact rows (v4)
+    python sprite_storage.py expand my_resource.json        # compact rows (v4) -> keyed sprites (v3)
+    python sprite_storage.py compress my_resource.json      # single JSON -> my_resource.json.gz
+    python sprite_storage.py decompress my_resource.json    # my_resource.json.gz -> single JSON
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import sqlite3
+import argparse
+from collections.abc import MutableMapping
+
+from sprite_model import PRIMARY_KEY, Sprite, sprite_json_default
+
+# :jp シャードを置くディレクトリの拡張子と、インデックスファイル名
+# :en Suffix of the shard directory, and the index file name
+SHARD_DIR_SUFFIX = ".sprites"
+INDEX_FILE = "index.json"
+
+# :jp SQLiteデータベースの拡張子
+# :en SQLite database suffix
+SQLITE_SUFFIX = ".sqlite"
+
+# :jp NAMEが空のスプライトを入れるグループのファイル名
+# :en File name of the group holding sprites without a NAME
+UNGROUPED_FILE = "_ungrouped.json"
+
+# :jp 圧縮した1ファイル形式の拡張子と圧縮レベル
+# :en Suffix and compression level of the compressed single-file layout
+GZIP_SUFFIX = ".gz"
+GZIP_LEVEL = 6
+GZIP_BATCH = 64 * 1024
+
+# :jp 1ファイル形式のバージョン（v3: "x_y" キーの辞書 / v4: タイル番号順の行リスト）
+# :en Single-file format versions (v3: dict keyed "x_y" / v4: rows ordered by tile index)
+KEYED_VERSION = "3.0"
+COMPACT_VERSION = "4.0"
+
+# :jp v4でタイル番号から座標を求める既定値（イメージバンク256ピクセル / 8ピクセルタイル）
+# :en Defaults for deriving coordinates from tile indexes in v4 (256 pixel bank / 8 pixel tiles)
+DEFAULT_TILE_COLUMNS = 32
+DEFAULT_SPRITE_SIZE = 8
+
+
+def shard_dir(json_path):
+    return os.path.splitext(json_path)[0] + SHARD_DIR_SUFFIX
+
+
+def index_path(json_path):
+    return os.path.join(shard_dir(json_path), INDEX_FILE)
+
+
+def is_sharded(json_path):
+    """
+    :jp JSONファイルに対応するシャード形式の保存先があるかどうかを返します
+    :en Return whether a sharded store exists for the given JSON path
+    """
+    return os.path.exists(index_path(json_path))
+
+
+def sqlite_path(json_path):
+    return os.path.splitext(json_path)[0] + SQLITE_SUFFIX
+
+
+def gzip_path(json_path):
+    return json_path + GZIP_SUFFIX
+
+
+def is_gzip(json_path):
+    """
+    :jp JSONファイルに対応する圧縮ファイル（.json.gz）があるかどうかを返します
+    :en Return whether a compressed file (.json.gz) exists for the given JSON path
+    """
+    return os.path.exists(gzip_path(json_path))
+
+
+def is_sqlite(json_path):
+    """
+    :jp JSONファイルに対応するSQLiteデータベースがあるかどうかを返します
+    :en Return whether an SQLite database exists for the given JSON path
+    """
+    return os.path.exists(sqlite_path(json_path))
+
+
+def storage_path(json_path):
+    """
+    :jp 変更検出に使うファイル（シャード形式ならインデックス、SQLiteならデータベース）のパスを返します
+    :en Return the file used for change detection (the index when sharded, the database for SQLite)
+    """
+    return open_store(json_path).path
+
+
+def dump_json(data):
+    return json.dumps(data, indent=2, ensure_ascii=False, default=sprite_json_default)
+
+
+def iter_json(data):
+    """
+    :jp dump_json と同じテキストを少しずつ返します（全体を1つの文字列にしない）
+    :en Yield the same text as dump_json piece by piece (never one whole string)
+    """
+    return json.JSONEncoder(indent=2, ensure_ascii=False, default=sprite_json_default).iterencode(data)
+
+
+def is_compact(sprite_data):
+    """
+    :jp meta.version が4以上（コンパクト形式で保存する）かどうかを返します
+    :en Return whether meta.version is 4 or later (saved in the compact layout)
+    """
+    version = str(sprite_data.get("meta", {}).get("version", ""))
+    major = version.split('.')[0]
+    return major.isdigit() and int(major) >= 4
+
+
+def tile_index(x, y, columns=DEFAULT_TILE_COLUMNS, size=DEFAULT_SPRITE_SIZE):
+    """
+    :jp タイル座標からタイル番号（左上から行優先）を計算します
+    :en Compute the tile index (row-major from the top left) of tile coordinates
+    """
+    return (y // size) * columns + x // size
+
+
+def pack_compact(sprite_data):
+    """
+    :jp sprite_data をv4の文書に変換します。スプライトはタイル番号順の行 [番号, 値...] になり、
+        値の並びは "fields" の順（未設定は null）、x/y はタイル番号から求めます
+    :en Convert sprite_data into a v4 document. Sprites become rows [index, values...] ordered
+        by tile index, values follow "fields" (null when unset) and x/y follow from the index
+    """
+    meta = dict(sprite_data.get("meta", {}))
+    size = meta.get("sprite_size", DEFAULT_SPRITE_SIZE)
+    columns = meta.setdefault("tile_columns", DEFAULT_TILE_COLUMNS)
+    meta["version"] = COMPACT_VERSION
+    sprites = sprite_data.get("sprites", {})
+    primary = sprites.get(PRIMARY_KEY)
+
+    fields = [name for name in (primary or {}) if name not in ("x", "y")]
+    slots = {name: i for i, name in enumerate(fields)}
+    rows = []
+    for key in sprites:
+        if key == PRIMARY_KEY:
+            continue
+        sprite = sprites[key]
+        x, y = sprite.get("x", 0), sprite.get("y", 0)
+        if key != f"{x}_{y}" or x % size or y % size or not 0 <= x < columns * size:
+            raise ValueError(f"Sprite {key} is not on the tile grid; it cannot be stored in the compact format")
+        values = []
+        for name, value in sprite.items():
+            if name in ("x", "y"):
+                continue
+            if name not in slots:
+                slots[name] = len(fields)
+                fields.append(name)
+            slot = slots[name]
+            if slot >= len(values):
+                values.extend([None] * (slot + 1 - len(values)))
+            values[slot] = value
+        rows.append([tile_index(x, y, columns, size)] + values)
+    rows.sort(key=lambda row: row[0])
+
+    document = {"meta": meta}
+    if primary is not None:
+        document[PRIMARY_KEY] = primary
+    for key, value in sprite_data.items():
+        if key not in ("meta", "sprites"):
+            document[key] = value
+    document["fields"] = fields
+    document["sprites"] = rows
+    return document
+
+
+def unpack_compact(document):
+    """
+    :jp v4の文書を "x_y" キーの sprite_data（v3と同じ形）に戻します
+    :en Turn a v4 document back into sprite_data keyed by "x_y" (the v3 shape)
+    """
+    meta = document.get("meta", {})
+    size = meta.get("sprite_size", DEFAULT_SPRITE_SIZE)
+    columns = meta.get("tile_columns", DEFAULT_TILE_COLUMNS)
+    fields = document.get("fields", [])
+
+    sprites = {}
+    if PRIMARY_KEY in document:
+        sprites[PRIMARY_KEY] = document[PRIMARY_KEY]
+    for row in document.get("sprites", []):
+        y, column = divmod(row[0], columns)
+        x, y = column * size, y * size
+        sprite = {"x": x, "y": y}
+        values = row[1:]
+        if None in values:
+            sprite.update((name, value) for name, value in zip(fields, values) if value is not None)
+        else:
+            sprite.update(zip(fields, values))
+        sprites[f"{x}_{y}"] = sprite
+
+    sprite_data = {key: value for key, value in document.items()
+                   if key not in (PRIMARY_KEY, "fields", "sprites")}
+    sprite_data["sprites"] = sprites
+    return sprite_data
+
+
+def iter_compact(sprite_data):
+    """
+    :jp v4の文書のテキストを少しずつ返します（差分が見やすいようスプライトは1行1件）
+    :en Yield the text of a v4 document piece by piece (one sprite per line so diffs stay readable)
+    """
+    document = pack_compact(sprite_data)
+    rows = document.pop("sprites")
+    yield dump_json(document)[:-2]
+    yield ',\n  "sprites": ['
+    separator = "\n    "
+    for row in rows:
+        yield separator + _compact_json(row)
+        separator = ",\n    "
+    yield ('\n' if rows else '') + '  ]\n}'
+
+
+def dump_compact(sprite_data):
+    return "".join(iter_compact(sprite_data))
+
+
+def iter_document(sprite_data):
+    """
+    :jp meta.version に合わせて1ファイル形式のテキストを少しずつ返します（v4ならコンパクト形式）
+    :en Yield the single-file text matching meta.version piece by piece (compact for v4)
+    """
+    return iter_compact(sprite_data) if is_compact(sprite_data) else iter_json(sprite_data)
+
+
+def dump_document(sprite_data):
+    return "".join(iter_document(sprite_data))
+
+
+def parse_document(document):
+    """
+    :jp 読み込んだ1ファイル形式の文書を sprite_data にします（v4なら "x_y" キーの形に戻す）
+    :en Turn a loaded single-file document into sprite_data (v4 is expanded back to "x_y" keys)
+    """
+    if is_compact(document) and isinstance(document.get("sprites"), list):
+        return unpack_compact(document)
+    return document
+
+
+def write_atomic(path, text):
+    """
+    :jp 一時ファイルに書いてから置き換え、保存途中のクラッシュでファイルが壊れないようにします
+    :en Write to a temporary file and replace, so a crash mid-save never truncates the file
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_atomic_gzip(path, chunks):
+    """
+    :jp テキストの断片を圧縮しながら一時ファイルに書き、置き換えます（全体を文字列にせずに保存）
+    :en Compress text pieces into a temporary file as they come, then replace (the whole text
+        is never held as one string)
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as raw:
+        # :jp mtime=0 で同じ内容なら同じバイト列になるようにする
+        # :en mtime=0 keeps the output byte-identical for identical contents
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as compressed:
+            with io.TextIOWrapper(compressed, encoding='utf-8') as text:
+                # :jp 細かい断片はまとめてから圧縮する（1断片ずつだと呼び出しが多すぎる）
+                # :en Batch small pieces before compressing (one call per piece is too many)
+                pending, size = [], 0
+                for chunk in chunks:
+                    pending.append(chunk)
+                    size += len(chunk)
+                    if size >= GZIP_BATCH:
+                        text.write("".join(pending))
+                        pending, size = [], 0
+                text.write("".join(pending))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+
+
+def group_of(sprite):
+    """
+    :jp スプライトが属するグループ（NAME）を返します
+    :en Return the group (NAME) a sprite belongs to
+    """
+    name = sprite.get("NAME", "")
+    return name if isinstance(name, str) else str(name)
+
+
+def _shard_file_name(group, used):
+    """
+    :jp グループ名からファイル名を作ります（使えない文字は _ に置換し、重複は連番で回避）
+    :en Build a file name from a group name (unsafe characters become _, clashes get a number)
+    """
+    if not group:
+        return UNGROUPED_FILE
+    base = re.sub(r'[^A-Za-z0-9_.-]', '_', group).strip('.') or "group"
+    name = f"{base}.json"
+    count = 1
+    while name in used or name in (INDEX_FILE, UNGROUPED_FILE):
+        count += 1
+        name = f"{base}_{count}.json"
+    return name
+
+
+class ShardedSprites(MutableMapping):
+    """
+    :jp sprite_data["sprites"] の代わりに使う辞書。キーの一覧（タイル -> グループ）はインデックスから
+        読み込み、グループのシャードは初めてアクセスされた時に読み込みます
+    :en Drop-in dict for sprite_data["sprites"]. The key list (tile -> group) comes from the
+        index; a group's shard is read the first time one of its tiles is accessed
+    """
+
+    def __init__(self, directory, primary, tiles, groups):
+        self.directory = directory
+        self.primary = primary
+        # :jp タイルキー -> グループ名 / グループ名 -> シャードのファイル名
+        # :en Tile key -> group name / group name -> shard file name
+        self.tiles = tiles
+        self.groups = groups
+        self.schema = None
+        # :jp 読み込み済みのシャード（グループ名 -> {タイルキー: スプライト}）と、読み込んだ時点の内容
+        # :en Loaded shards (group name -> {tile key: sprite}) and their contents as loaded
+        self.loaded = {}
+        self.snapshots = {}
+
+    def bind_schema(self, schema):
+        """
+        :jp シャード読み込み時にSpriteレコードへ変換するためのスキーマを設定します
+        :en Set the schema used to convert records to Sprite when shards are loaded
+        """
+        self.schema = schema
+
+    def shard(self, group):
+        """
+        :jp グループのシャードを返します（未読み込みならここで読み込む）
+        :en Return a group's shard (loading it on first use)
+        """
+        shard = self.loaded.get(group)
+        if shard is not None:
+            return shard
+
+        shard = {}
+        text = None
+        file_name = self.groups.get(group)
+        if file_name:
+            try:
+                with open(os.path.join(self.directory, file_name), 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except FileNotFoundError:
+                text = None
+        if text is not None:
+            for key, data in json.loads(text).get("sprites", {}).items():
+                shard[key] = Sprite.from_json(data, self.schema) if self.schema else data
+        self.loaded[group] = shard
+        self.snapshots[group] = text
+        return shard
+
+    def regroup(self):
+        """
+        :jp その場で編集されてNAMEが変わったスプライトを、新しいグループのシャードへ移します
+        :en Move sprites whose NAME was edited in place into their new group's shard
+        """
+        moved = [(key, sprite) for group, shard in list(self.loaded.items())
+                 for key, sprite in shard.items() if group_of(sprite) != group]
+        for key, sprite in moved:
+            self[key] = sprite
+        return len(moved)
+
+    def tile_positions(self):
+        """
+        :jp シャードを読み込まずに定義済みタイルの (キー, x, y) を返します（キーは "x_y" 形式）
+        :en Return (key, x, y) of defined tiles without loading shards (keys are "x_y")
+        """
+        positions = []
+        for key in self.tiles:
+            x, _, y = key.partition('_')
+            positions.append((key, int(x), int(y)))
+        return positions
+
+    def __getitem__(self, key):
+        if key == PRIMARY_KEY:
+            if self.primary is None:
+                raise KeyError(key)
+            return self.primary
+        return self.shard(self.tiles[key])[key]
+
+    def __setitem__(self, key, sprite):
+        if key == PRIMARY_KEY:
+            self.primary = sprite
+            return
+        group = group_of(sprite)
+        old_group = self.tiles.get(key)
+        if old_group is not None and old_group != group:
+            self.shard(old_group).pop(key, None)
+        if group not in self.groups:
+            self.groups[group] = _shard_file_name(group, set(self.groups.values()))
+        self.shard(group)[key] = sprite
+        self.tiles[key] = group
+
+    def __delitem__(self, key):
+        if key == PRIMARY_KEY:
+            if self.primary is None:
+                raise KeyError(key)
+            self.primary = None
+            return
+        group = self.tiles.pop(key)
+        self.shard(group).pop(key, None)
+
+    def __contains__(self, key):
+        if key == PRIMARY_KEY:
+            return self.primary is not None
+        return key in self.tiles
+
+    def __iter__(self):
+        if self.primary is not None:
+            yield PRIMARY_KEY
+        yield from list(self.tiles)
+
+    def __len__(self):
+        return len(self.tiles) + (self.primary is not None)
+
+
+def load_sharded(json_path):
+    """
+    :jp シャード形式の保存先からインデックスだけを読み込み、sprite_data を返します
+    :en Read only the index of a sharded store and return sprite_data
+    """
+    directory = shard_dir(json_path)
+    with open(os.path.join(directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    sprites = ShardedSprites(directory,
+                             index.get("sprites", {}).get(PRIMARY_KEY),
+                             index.get("tiles", {}),
+                             index.get("groups", {}))
+    sprite_data = {"meta": index.get("meta", {}), "sprites": sprites}
+    if "collision" in index:
+        sprite_data["collision"] = index["collision"]
+    return sprite_data
+
+
+def _index_document(sprite_data, sprites):
+    index = {"meta": sprite_data.get("meta", {}),
+             "sprites": {PRIMARY_KEY: sprites.primary} if sprites.primary is not None else {}}
+    if "collision" in sprite_data:
+        index["collision"] = sprite_data["collision"]
+    index["groups"] = {group: sprites.groups[group] for group in sorted(set(sprites.tiles.values()))}
+    index["tiles"] = sprites.tiles
+    return index
+
+
+def save_sharded(json_path, sprite_data):
+    """
+    :jp 内容が変わったシャードとインデックスだけを書き込みます。空になったシャードは削除します
+    :en Write only the shards (and the index) whose contents changed; emptied shards are removed
+
+    :jp 戻り値は書き込んだ（または削除した）ファイル数です
+    :en Returns the number of files written (or removed)
+    """
+    directory = shard_dir(json_path)
+    os.makedirs(directory, exist_ok=True)
+    sprites = sprite_data["sprites"]
+    sprites.regroup()
+    written = 0
+
+    for group, shard in sprites.loaded.items():
+        file_name = sprites.groups.get(group)
+        if not file_name:
+            continue
+        path = os.path.join(directory, file_name)
+        if not shard:
+            if sprites.snapshots.get(group) is not None:
+                os.remove(path)
+                sprites.snapshots[group] = None
+                written += 1
+            continue
+        text = dump_json({"sprites": shard})
+        if text != sprites.snapshots.get(group):
+            write_atomic(path, text)
+            sprites.snapshots[group] = text
+            written += 1
+
+    index_file = os.path.join(directory, INDEX_FILE)
+    text = dump_json(_index_document(sprite_data, sprites))
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            unchanged = f.read() == text
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        write_atomic(index_file, text)
+        written += 1
+    return written
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sprites (
+    key TEXT PRIMARY KEY,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    name TEXT,
+    act_name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sprites_position ON sprites (y, x);
+CREATE INDEX IF NOT EXISTS sprites_name ON sprites (name, act_name);
+"""
+
+
+def _compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=sprite_json_default)
+
+
+class SqliteSprites(MutableMapping):
+    """
+    :jp sprite_data["sprites"] の代わりに使う辞書。キー・座標・NAMEは開いた時に読み込み、
+        各スプライトの内容は初めてアクセスされた時に1行ずつ読み込みます
+    :en Drop-in dict for sprite_data["sprites"]. Keys, positions and NAMEs are read when the
+        database is opened; each sprite's contents are read row by row on first access
+    """
+
+    def __init__(self, connection, primary):
+        self.connection = connection
+        self.primary = primary
+        self.schema = None
+        # :jp タイルキー -> NAME / タイルキー -> (x, y)
+        # :en Tile key -> NAME / tile key -> (x, y)
+        self.tiles = {}
+        self.positions = {}
+        for key, x, y, name in connection.execute("SELECT key, x, y, name FROM sprites"):
+            self.tiles[key] = name or ""
+            self.positions[key] = (x, y)
+        # :jp 読み込んだ（=変更された可能性がある）行と、読み込んだ時点の内容
+        # :en Rows that were read (and so may have been changed) and their contents as read
+        self.loaded = {}
+        self.snapshots = {}
+        self.deleted = set()
+
+    def bind_schema(self, schema):
+        self.schema = schema
+
+    def tile_positions(self):
+        return [(key, x, y) for key, (x, y) in self.positions.items()]
+
+    def __getitem__(self, key):
+        if key == PRIMARY_KEY:
+            if self.primary is None:
+                raise KeyError(key)
+            return self.primary
+        sprite = self.loaded.get(key)
+        if sprite is not None:
+            return sprite
+        if key not in self.tiles:
+            raise KeyError(key)
+        row = self.connection.execute("SELECT data FROM sprites WHERE key = ?", (key,)).fetchone()
+        data = json.loads(row[0]) if row else {}
+        sprite = Sprite.from_json(data, self.schema) if self.schema else data
+        self.loaded[key] = sprite
+        self.snapshots[key] = row[0] if row else None
+        return sprite
+
+    def __setitem__(self, key, sprite):
+        if key == PRIMARY_KEY:
+            self.primary = sprite
+            return
+        if key not in self.snapshots:
+            row = self.connection.execute("SELECT data FROM sprites WHERE key = ?", (key,)).fetchone()
+            self.snapshots[key] = row[0] if row else None
+        self.loaded[key] = sprite
+        self.tiles[key] = group_of(sprite)
+        self.positions[key] = (sprite.get("x", 0), sprite.get("y", 0))
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key == PRIMARY_KEY:
+            if self.primary is None:
+                raise KeyError(key)
+            self.primary = None
+            return
+        del self.tiles[key]
+        self.positions.pop(key, None)
+        self.loaded.pop(key, None)
+        self.snapshots.pop(key, None)
+        self.deleted.add(key)
+
+    def __contains__(self, key):
+        if key == PRIMARY_KEY:
+            return self.primary is not None
+        return key in self.tiles
+
+    def __iter__(self):
+        if self.primary is not None:
+            yield PRIMARY_KEY
+        yield from list(self.tiles)
+
+    def __len__(self):
+        return len(self.tiles) + (self.primary is not None)
+
+
+def open_sqlite(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SQLITE_SCHEMA)
+    return connection
+
+
+def load_sqlite(json_path):
+    """
+    :jp SQLiteデータベースからメタ情報とキーの一覧だけを読み込み、sprite_data を返します
+    :en Read only the metadata and key list from the SQLite database and return sprite_data
+    """
+    connection = open_sqlite(sqlite_path(json_path))
+    meta = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+    sprites = SqliteSprites(connection, meta.get(PRIMARY_KEY))
+    sprite_data = {"meta": meta.get("meta", {}), "sprites": sprites}
+    if "collision" in meta:
+        sprite_data["collision"] = meta["collision"]
+    return sprite_data
+
+
+def save_sqlite(json_path, sprite_data):
+    """
+    :jp 内容が変わった行とメタ情報だけを1つのトランザクションで書き込みます
+    :en Write only the changed rows and the metadata in a single transaction
+
+    :jp 戻り値は書き込んだ（または削除した）スプライト数です
+    :en Returns the number of sprites written (or deleted)
+    """
+    sprites = sprite_data["sprites"]
+    if not isinstance(sprites, SqliteSprites):
+        # :jp 通常の辞書（インポート時）はすべての行を書き込む
+        # :en Plain dicts (when importing) write every row
+        primary = sprites.get(PRIMARY_KEY)
+        connection = open_sqlite(sqlite_path(json_path))
+        wrapped = SqliteSprites(connection, primary)
+        for key, sprite in sprites.items():
+            if key != PRIMARY_KEY:
+                wrapped[key] = sprite
+        sprites = wrapped
+    connection = sprites.connection
+
+    rows = []
+    for key, sprite in sprites.loaded.items():
+        text = _compact_json(sprite)
+        if text != sprites.snapshots.get(key):
+            rows.append((key, sprite.get("x", 0), sprite.get("y", 0), group_of(sprite),
+                         sprite.get("ACT_NAME"), text))
+            sprites.snapshots[key] = text
+            sprites.tiles[key] = group_of(sprite)
+            sprites.positions[key] = (sprite.get("x", 0), sprite.get("y", 0))
+    meta_rows = [("meta", _compact_json(sprite_data.get("meta", {})))]
+    if sprites.primary is not None:
+        meta_rows.append((PRIMARY_KEY, _compact_json(sprites.primary)))
+    if "collision" in sprite_data:
+        meta_rows.append(("collision", _compact_json(sprite_data["collision"])))
+
+    with connection:
+        connection.executemany("DELETE FROM sprites WHERE key = ?", [(key,) for key in sprites.deleted])
+        connection.executemany("INSERT OR REPLACE INTO sprites (key, x, y, name, act_name, data) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta_rows)
+        if sprites.primary is None:
+            connection.execute("DELETE FROM meta WHERE key = ?", (PRIMARY_KEY,))
+    written = len(rows) + len(sprites.deleted)
+    sprites.deleted.clear()
+    return written
+
+
+class JsonStore:
+    """
+    :jp 1ファイル形式のJSON（既定）
+    :en Single JSON file (default)
+    """
+    kind = "json"
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        self.path = json_path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def modified_ns(self):
+        """
+        :jp 保存先の更新時刻（ナノ秒, 無ければ -1）を返します（編集ログが古いかの判定に使う）
+        :en Return the store's modification time in ns (-1 if missing; used to detect stale edit logs)
+        """
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return -1
+
+    def load(self):
+        """
+        :jp meta.version を見てv3（キー付き辞書）とv4（タイル番号順の行）のどちらも読み込みます
+        :en Read both v3 (keyed dict) and v4 (rows ordered by tile index), detected via meta.version
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return parse_document(json.load(f))
+
+    def save(self, sprite_data):
+        write_atomic(self.path, dump_document(sprite_data))
+        return 1
+
+
+class GzipJsonStore(JsonStore):
+    """
+    :jp gzip圧縮した1ファイル形式（.json.gz）。保存時は圧縮しながら少しずつ書き込みます
+    :en Gzip-compressed single file (.json.gz); saving compresses the text as it is generated
+    """
+    kind = "json.gz"
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        self.path = gzip_path(json_path)
+
+    def load(self):
+        with gzip.open(self.path, 'rb') as f:
+            return parse_document(json.load(f))
+
+    def save(self, sprite_data):
+        write_atomic_gzip(self.path, iter_document(sprite_data))
+        return 1
+
+
+class ShardedStore(JsonStore):
+    """
+    :jp NAMEグループごとのシャード形式
+    :en Sharded layout (one file per NAME group)
+    """
+    kind = "sharded"
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        self.path = index_path(json_path)
+
+    def load(self):
+        return load_sharded(self.json_path)
+
+    def modified_ns(self):
+        """
+        :jp インデックスは内容が変わった時だけ書き込まれるため、最も新しいシャードの更新時刻を返します
+        :en The index is only rewritten when it changes, so return the newest shard's modification time
+        """
+        try:
+            with os.scandir(shard_dir(self.json_path)) as entries:
+                return max((entry.stat().st_mtime_ns for entry in entries
+                            if entry.name.endswith('.json') and entry.is_file()), default=-1)
+        except FileNotFoundError:
+            return -1
+
+    def save(self, sprite_data):
+        return save_sharded(self.json_path, sprite_data)
+
+
+class SqliteStore(JsonStore):
+    """
+    :jp SQLiteデータベース
+    :en SQLite database
+    """
+    kind = "sqlite"
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        self.path = sqlite_path(json_path)
+
+    def load(self):
+        return load_sqlite(self.json_path)
+
+    def save(self, sprite_data):
+        return save_sqlite(self.json_path, sprite_data)
+
+
+def open_store(json_path):
+    """
+    :jp JSONファイルのパスから保存先を選びます（SQLite > シャード形式 > 圧縮ファイル > 1ファイル形式の順）
+    :en Choose the store for a JSON path (SQLite, then sharded, then compressed, then single file)
+    """
+    if is_sqlite(json_path):
+        return SqliteStore(json_path)
+    if is_sharded(json_path):
+        return ShardedStore(json_path)
+    if is_gzip(json_path):
+        return GzipJsonStore(json_path)
+    return JsonStore(json_path)
+
+
+def single_file_store(json_path):
+    """
+    :jp 1ファイル形式の保存先を返します（.json.gz があれば圧縮ファイル）
+    :en Return the single-file store (the compressed file if a .json.gz exists)
+    """
+    return GzipJsonStore(json_path) if is_gzip(json_path) else JsonStore(json_path)
+
+
+def materialize(sprite_data):
+    """
+    :jp 遅延読み込みの sprite_data をすべて読み込んだ通常の辞書に変換します（エクスポート用）
+    :en Turn lazily loaded sprite_data into plain, fully loaded dicts (for export)
+    """
+    result = dict(sprite_data)
+    result["sprites"] = {key: sprite_data["sprites"][key] for key in sprite_data["sprites"]}
+    return result
+
+
+def split_json(json_path):
+    """
+    :jp 1ファイル形式のJSONをシャード形式に変換します
+    :en Convert a monolithic JSON file into the sharded layout
+    """
+    raw = single_file_store(json_path).load()
+    raw_sprites = raw.get("sprites", {})
+    sprites = ShardedSprites(shard_dir(json_path), raw_sprites.get(PRIMARY_KEY), {}, {})
+    for key, data in raw_sprites.items():
+        if key != PRIMARY_KEY:
+            sprites[key] = data
+    sprite_data = dict(raw)
+    sprite_data["sprites"] = sprites
+    save_sharded(json_path, sprite_data)
+    return sprite_data
+
+
+def join_sharded(json_path):
+    """
+    :jp シャード形式を1ファイル形式のJSONに戻します
+    :en Convert the sharded layout back into a monolithic JSON file
+    """
+    sprite_data = materialize(load_sharded(json_path))
+    single_file_store(json_path).save(sprite_data)
+    return sprite_data
+
+
+def import_sqlite(json_path):
+    """
+    :jp 1ファイル形式のJSONをSQLiteデータベースに取り込みます
+    :en Import a single JSON file into the SQLite database
+    """
+    sprite_data = single_file_store(json_path).load()
+    if os.path.exists(sqlite_path(json_path)):
+        os.remove(sqlite_path(json_path))
+    save_sqlite(json_path, sprite_data)
+    return sprite_data
+
+
+def export_sqlite(json_path):
+    """
+    :jp SQLiteデータベースを1ファイル形式のJSONに書き出します
+    :en Export the SQLite database to a single JSON file
+    """
+    sprite_data = materialize(load_sqlite(json_path))
+    single_file_store(json_path).save(sprite_data)
+    return sprite_data
+
+
+def convert_format(json_path, version):
+    """
+    :jp 1ファイル形式のJSONを指定したバージョン（v3 / v4）で書き直します
+    :en Rewrite a single JSON file in the given format version (v3 / v4)
+    """
+    store = single_file_store(json_path)
+    sprite_data = store.load()
+    sprite_data.setdefault("meta", {})["version"] = version
+    if version == KEYED_VERSION:
+        sprite_data["meta"].pop("tile_columns", None)
+    store.save(sprite_data)
+    return sprite_data
+
+
+def set_compression(json_path, compressed):
+    """
+    :jp 1ファイル形式のJSONを圧縮（.json.gz）または展開（.json）し、元のファイルを削除します
+    :en Compress a single JSON file to .json.gz (or expand it back to .json) and remove the original
+    """
+    source = JsonStore(json_path) if compressed else GzipJsonStore(json_path)
+    target = GzipJsonStore(json_path) if compressed else JsonStore(json_path)
+    sprite_data = source.load()
+    target.save(sprite_data)
+    os.remove(source.path)
+    return sprite_data, source.path, target.path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert sprite definitions between single-file, sharded and SQLite layouts")
+    parser.add_argument('command', choices=['split', 'join', 'to-sqlite', 'from-sqlite',
+                                            'compact', 'expand', 'compress', 'decompress'])
+    parser.add_argument('json_file', help="sprite definition JSON (e.g. my_resource.json)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'split':
+        sprite_data = split_json(args.json_file)
+        sprites = sprite_data["sprites"]
+        print(f"Split {len(sprites.tiles)} sprites into {len(sprites.groups)} shards in {shard_dir(args.json_file)}")
+    elif args.command == 'join':
+        sprite_data = join_sharded(args.json_file)
+        print(f"Joined {len(sprite_data['sprites'])} sprites into {args.json_file}")
+        print(f"Remove {shard_dir(args.json_file)} to use the single-file layout")
+    elif args.command == 'to-sqlite':
+        sprite_data = import_sqlite(args.json_file)
+        print(f"Imported {len(sprite_data.get('sprites', {}))} sprites into {sqlite_path(args.json_file)}")
+    elif args.command == 'from-sqlite':
+        sprite_data = export_sqlite(args.json_file)
+        print(f"Exported {len(sprite_data['sprites'])} sprites to {args.json_file}")
+        print(f"Remove {sqlite_path(args.json_file)} to use the single-file layout")
+    elif args.command in ('compact', 'expand'):
+        path = single_file_store(args.json_file).path
+        before = os.path.getsize(path)
+        version = COMPACT_VERSION if args.command == 'compact' else KEYED_VERSION
+        sprite_data = convert_format(args.json_file, version)
+        print(f"Rewrote {len(sprite_data['sprites'])} sprites in {path} as v{version} "
+              f"({before} -> {os.path.getsize(path)} bytes)")
+    else:
+        sprite_data, source, target = set_compression(args.json_file, args.command == 'compress')
+        print(f"Wrote {len(sprite_data['sprites'])} sprites to {target} "
+              f"({os.path.getsize(target)} bytes), removed {source}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
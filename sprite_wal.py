@@ -0,0 +1,127 @@
+"""
+sprite_wal - Write-ahead log of sprite edit operations for crash recovery
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import os
+import json
+
+from sprite_model import Sprite, sprite_json_default
+
+# :jp ログファイルの拡張子（保存先のファイル名の後ろに付ける）
+# :en Log file suffix (appended to the name of the store's file)
+WAL_SUFFIX = ".wal"
+
+# :jp データのみ同期（メタデータ更新を省く）できる環境ではfdatasyncを使う
+# :en Use fdatasync (skips metadata updates) where available
+_sync = getattr(os, 'fdatasync', os.fsync)
+
+
+def file_mtime(path):
+    """
+    :jp ファイルの更新時刻（ナノ秒）を返します（無ければ -1）
+    :en Return a file's modification time in ns (-1 if it does not exist)
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+class WriteAheadLog:
+    """
+    :jp 編集操作を1行1レコード（JSON Lines）で追記し、レコードごとにディスクへ同期します。
+        JSONファイルの保存が完了したらログを空にします
+    :en Appends edit operations as one JSON line per record and syncs each record to disk.
+        The log is emptied once the JSON file has been saved
+    """
+
+    def __init__(self, data_path, data_mtime=None):
+        """
+        :jp data_path は保存先の実際のファイル（.json / .json.gz / シャードのインデックス / SQLite）です。
+            data_mtime は保存先の更新時刻（ナノ秒, 無ければ -1）を返す関数で、省略時は data_path の更新時刻を使います
+        :en data_path is the store's real file (.json / .json.gz / shard index / SQLite database).
+            data_mtime returns the store's modification time (ns, -1 if missing); defaults to data_path's
+        """
+        self.path = data_path + WAL_SUFFIX
+        self.data_path = data_path
+        self.data_mtime = data_mtime or (lambda: file_mtime(data_path))
+        self.file = None
+
+    def append(self, op, key, data=None):
+        """
+        :jp 操作を記録します（op: "put" / "delete"）
+        :en Record an operation (op: "put" / "delete")
+        """
+        record = {"op": op, "key": key}
+        if data is not None:
+            record["data"] = data
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=sprite_json_default)
+
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        self.file.write(line.encode('utf-8') + b"\n")
+        self.file.flush()
+        _sync(self.file.fileno())
+
+    def clear(self):
+        """
+        :jp ログを破棄します（保存完了後に呼び出す）
+        :en Discard the log (call after a completed save)
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def is_stale(self, wal_mtime=None):
+        """
+        :jp ログが保存先より古い（内容は保存済み）かどうかを返します
+        :en Return whether the log is older than the store (its edits are already saved)
+        """
+        if wal_mtime is None:
+            wal_mtime = file_mtime(self.path)
+        return 0 <= wal_mtime < self.data_mtime()
+
+    def pending(self):
+        """
+        :jp 保存先より新しいログがあれば、そのレコード一覧を返します（無ければ空リスト）。
+            書き込み途中で壊れた末尾の行は無視します
+        :en Return the records of a log newer than the store (empty list if none).
+            A torn trailing line is ignored
+        """
+        wal_mtime = file_mtime(self.path)
+        if wal_mtime < 0 or self.is_stale(wal_mtime):
+            return []
+
+        records = []
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line.decode('utf-8')))
+                except (UnicodeDecodeError, ValueError):
+                    break
+        return records
+
+
+def replay(sprite_data, records, schema):
+    """
+    :jp ログのレコードをスプライトデータに適用します
+    :en Apply log records to sprite data
+    """
+    sprites = sprite_data["sprites"]
+    for record in records:
+        key = record.get("key")
+        if record.get("op") == "put":
+            sprites[key] = Sprite.from_json(record.get("data", {}), schema)
+        elif record.get("op") == "delete":
+            sprites.pop(key, None)
+    return len(records)
@@ -0,0 +1,120 @@
+"""
+tile_similarity - Find tiles that look like a given tile (near-duplicates, slight variations)
+
+Every tile of the bank is described by a compact feature vector:
+    16 values   color histogram of the opaque pixels
+    16 values   opaque coverage of each 2x2 pixel cell (4x4 layout)
+The nearest tiles by feature distance are re-ranked by exact pixel differences.
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import bank_analysis
+
+# :jp NumPyは任意依存（bank_analysis.available() で確認してから使う）
+# :en NumPy is optional (check bank_analysis.available() before use)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# :jp 既定の検索件数
+# :en Default number of results
+DEFAULT_TOP_K = 8
+
+# :jp 画素の比較で並べ直す候補の倍率（top_k の何倍を候補にするか）
+# :en How many candidates (times top_k) are re-ranked by pixel comparison
+SHORTLIST_FACTOR = 4
+
+# :jp レイアウト特徴のセルの大きさ（ピクセル）
+# :en Cell size (pixels) of the layout features
+LAYOUT_CELL = 2
+
+
+def tile_features(blocks, colkey=0):
+    """
+    :jp (n, size, size) のタイル群から (n, 32) の特徴ベクトル（float32）を計算します
+    :en Compute (n, 32) float32 feature vectors for n (size, size) tiles
+    """
+    count, size = blocks.shape[0], blocks.shape[1]
+    flat = blocks.reshape(count, -1)
+    opaque = flat != colkey
+
+    # :jp 不透明ピクセルの色ヒストグラム（タイルの画素数で正規化）
+    # :en Color histogram of the opaque pixels (normalized by the tile's pixel count)
+    colors = np.where(opaque, flat, 16).astype(np.intp)
+    offsets = np.arange(count, dtype=np.intp)[:, None] * 17
+    histogram = np.bincount((colors + offsets).ravel(), minlength=count * 17).reshape(count, 17)[:, :16]
+
+    # :jp 2x2 セルごとの不透明ピクセルの割合（形の配置）
+    # :en Opaque coverage of each 2x2 cell (the shape's layout)
+    cells = size // LAYOUT_CELL
+    layout = opaque.reshape(count, cells, LAYOUT_CELL, cells, LAYOUT_CELL).mean(axis=(2, 4))
+
+    pixels = float(size * size)
+    return np.hstack([histogram / pixels, layout.reshape(count, -1)]).astype(np.float32)
+
+
+class TileSimilarityIndex:
+    """
+    :jp イメージバンクの全タイルの特徴ベクトルをメモリ上に保持し、似ているタイルを検索します
+        （バンクの画素が変わった時だけ作り直す）
+    :en Keeps the feature vectors of every bank tile in memory and searches for similar tiles
+        (rebuilt only when the bank pixels change)
+    """
+
+    def __init__(self, size=8, colkey=0):
+        self.size = size
+        self.colkey = colkey
+        self.bank_digest = None
+        self.columns = 0
+        self.tiles = None
+        self.features = None
+        self.empty = None
+
+    def sync(self, pixels):
+        """
+        :jp イメージバンクの画素が変わっていれば特徴ベクトルを計算し直します
+        :en Recompute the feature vectors if the bank pixels changed
+        """
+        digest = bank_analysis.bank_digest(pixels)
+        if digest == self.bank_digest:
+            return
+        blocks = bank_analysis.tile_blocks(pixels, self.size)
+        self.columns = blocks.shape[1]
+        self.tiles = blocks.reshape(-1, self.size * self.size)
+        self.features = tile_features(self.tiles.reshape(-1, self.size, self.size), self.colkey)
+        self.empty = (self.tiles == self.colkey).all(axis=1)
+        self.bank_digest = digest
+
+    def query(self, tile_x, tile_y, top_k=DEFAULT_TOP_K):
+        """
+        :jp 指定タイルに似ているタイルを似ている順に [(x, y, 距離), ...] で返します
+            （タイル自身と、指定タイルが空でなければ空のタイルは除く）
+        :en Return the tiles most similar to the given tile as [(x, y, distance), ...], closest
+            first (excluding the tile itself, and empty tiles unless the query is empty)
+        """
+        if self.features is None:
+            return []
+        index = (tile_y // self.size) * self.columns + tile_x // self.size
+        if not 0 <= index < len(self.features):
+            return []
+
+        distances = ((self.features - self.features[index]) ** 2).sum(axis=1)
+        distances[index] = np.inf
+        if not self.empty[index]:
+            distances[self.empty] = np.inf
+
+        # :jp 特徴の距離で候補を絞り、画素が違う割合を加えて並べ直す
+        # :en Shortlist by feature distance, then re-rank with the fraction of differing pixels
+        shortlist = min(len(distances) - 1, top_k * SHORTLIST_FACTOR)
+        candidates = np.argpartition(distances, shortlist)[:shortlist]
+        candidates = candidates[np.isfinite(distances[candidates])]
+        mismatch = (self.tiles[candidates] != self.tiles[index]).mean(axis=1)
+        scores = distances[candidates] + mismatch
+        order = candidates[np.argsort(scores, kind='stable')][:top_k]
+        ranked = dict(zip(candidates.tolist(), scores.tolist()))
+
+        return [((i % self.columns) * self.size, (i // self.columns) * self.size, ranked[i])
+                for i in order.tolist()]
@@ -0,0 +1,84 @@
+"""
+tilemap_view - Chunked offscreen rendering of Pyxel tilemaps for the tilemap preview
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import zlib
+from collections import OrderedDict
+
+import pyxel
+
+import bank_analysis
+
+# :jp 1チャンクのタイル数（一辺）と、キャッシュするチャンク数
+# :en Tiles per chunk side, and the number of cached chunks
+CHUNK_TILES = 16
+DEFAULT_CAPACITY = 64
+
+
+def tile_names(sprites, size=8):
+    """
+    :jp バンク上のタイル座標 (x, y) -> NAME の辞書を作ります（シャード形式ではインデックスのグループ名を使う）
+    :en Build a bank tile (x, y) -> NAME dict (sharded storage uses the group names from its index)
+    """
+    names = {}
+    groups = getattr(sprites, 'tiles', None)
+    for key, x, y in bank_analysis.sprite_positions(sprites):
+        name = groups[key] if groups is not None else sprites[key].get("NAME", "")
+        if name:
+            names[(x // size, y // size)] = name
+    return names
+
+
+class TilemapChunkCache:
+    """
+    :jp タイルマップを CHUNK_TILES x CHUNK_TILES タイルのチャンクに分けて画像化し、LRU順で保持します。
+        チャンク内のタイルが変わった時（とイメージバンクの画素が変わった時）だけ描き直します
+    :en Renders a tilemap in CHUNK_TILES x CHUNK_TILES tile chunks kept in LRU order. A chunk is
+        redrawn only when its tiles change (or when the image bank pixels change)
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.bank_digest = None
+        self.renders = 0
+
+    def sync(self, pixels):
+        """
+        :jp イメージバンクの画素が変わっていれば全チャンクを破棄します
+        :en Drop every chunk if the image bank pixels changed
+        """
+        digest = bank_analysis.bank_digest(pixels)
+        if digest != self.bank_digest:
+            self.entries.clear()
+            self.bank_digest = digest
+
+    def chunk(self, map_index, tiles, pixels, chunk_x, chunk_y, size=8):
+        """
+        :jp チャンクの画像を返します（タイルのダイジェストが変わっていれば描き直す）
+        :en Return a chunk image (redrawn when the digest of its tiles changed)
+        """
+        sub = tiles[chunk_y * CHUNK_TILES:(chunk_y + 1) * CHUNK_TILES,
+                    chunk_x * CHUNK_TILES:(chunk_x + 1) * CHUNK_TILES]
+        digest = zlib.crc32(bank_analysis.np.ascontiguousarray(sub))
+        key = (map_index, chunk_x, chunk_y)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            if entry["digest"] == digest:
+                return entry["image"]
+        else:
+            entry = self.entries[key] = {"image": pyxel.Image(CHUNK_TILES * size, CHUNK_TILES * size)}
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+        composed = bank_analysis.compose_tiles(pixels, sub, size)
+        target = bank_analysis.bank_pixels(entry["image"])
+        target[:] = 0
+        target[:composed.shape[0], :composed.shape[1]] = composed
+        entry["digest"] = digest
+        self.renders += 1
+        return entry["image"]
@@ -0,0 +1,157 @@
+"""
+viewport - Screen <-> tile coordinate lookup tables for the sprite sheet view
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+
+class Viewport:
+    """
+    :jp スプライトシートの表示領域（画面上の位置・大きさ・拡大率）とスクロール位置を持ち、
+        画面座標 -> タイル座標 / タイル座標 -> 画面座標 の変換表を軸ごとに作ります。
+        変換表はスクロール位置かレイアウトが変わった時だけ作り直します
+    :en Holds the sprite sheet view (screen position, size, zoom) and scroll position, and
+        builds per-axis screen -> tile / tile -> screen lookup tables. The tables are rebuilt
+        only when the scroll position or the layout changes
+    """
+
+    def __init__(self, x, y, width, height, bank_width=256, bank_height=256, tile_size=8, zoom=1):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.bank_width = bank_width
+        self.bank_height = bank_height
+        self.tile_size = tile_size
+        self.zoom = zoom
+        self.scroll_x = 0
+        self.scroll_y = 0
+        # :jp 画面上のオフセット -> タイル座標（範囲外は -1）/ タイル列・行 -> 画面座標（全体が見えなければ None）
+        # :en Screen offset -> tile coordinate (-1 outside the bank) / tile column, row -> screen
+        #     coordinate (None unless fully visible)
+        self.tile_x_at = None
+        self.tile_y_at = None
+        self.screen_x_of = None
+        self.screen_y_of = None
+        self.rebuilds = 0
+
+    @property
+    def max_scroll_x(self):
+        return max(0, self.bank_width - self.width // self.zoom)
+
+    @property
+    def max_scroll_y(self):
+        return max(0, self.bank_height - self.height // self.zoom)
+
+    def scroll_to(self, scroll_x, scroll_y):
+        """
+        :jp スクロール位置を範囲内に収めて設定します（変わった時だけ変換表を破棄）
+        :en Set the scroll position clamped to the bank (the tables are dropped only on change)
+        """
+        scroll_x = min(self.max_scroll_x, max(0, scroll_x))
+        scroll_y = min(self.max_scroll_y, max(0, scroll_y))
+        if (scroll_x, scroll_y) != (self.scroll_x, self.scroll_y):
+            self.scroll_x, self.scroll_y = scroll_x, scroll_y
+            self.invalidate()
+
+    def scroll_into_view(self, tile_x, tile_y):
+        """
+        :jp タイル全体が見えていなければ、そのタイルが表示の中心に来るようにスクロールします
+        :en If the tile is not fully visible, scroll so that it comes to the center of the view
+        """
+        if self.tile_screen(tile_x, tile_y) is not None:
+            return
+        size = self.tile_size
+        self.scroll_to((tile_x - self.width // self.zoom // 2) // size * size,
+                       (tile_y - self.height // self.zoom // 2) // size * size)
+
+    def set_layout(self, x, y, width, height, zoom=1):
+        """
+        :jp 表示領域を変更します（変わった時だけ変換表を破棄し、スクロール位置を収め直す）
+        :en Change the view area (the tables are dropped only on change, and the scroll is re-clamped)
+        """
+        if (x, y, width, height, zoom) != (self.x, self.y, self.width, self.height, self.zoom):
+            self.x, self.y, self.width, self.height, self.zoom = x, y, width, height, zoom
+            self.invalidate()
+            self.scroll_to(self.scroll_x, self.scroll_y)
+
+    def set_bank_size(self, bank_width, bank_height):
+        """
+        :jp 表示する内容（イメージバンク・タイルマップ）の大きさ（ピクセル）を変更します
+            （変わった時だけ変換表を破棄し、スクロール位置を収め直す）
+        :en Change the size in pixels of the shown content (image bank, tilemap)
+            (the tables are dropped only on change, and the scroll is re-clamped)
+        """
+        if (bank_width, bank_height) != (self.bank_width, self.bank_height):
+            self.bank_width, self.bank_height = bank_width, bank_height
+            self.invalidate()
+            self.scroll_to(self.scroll_x, self.scroll_y)
+
+    def to_screen(self, x, y):
+        """
+        :jp 内容のピクセル座標を画面座標に変換します（表示範囲外でもそのまま返す。タイルより大きい単位の描画用）
+        :en Convert content pixel coords to screen coords (returned even when off view; for drawing
+            units larger than a tile)
+        """
+        return self.x + (x - self.scroll_x) * self.zoom, self.y + (y - self.scroll_y) * self.zoom
+
+    def invalidate(self):
+        self.tile_x_at = None
+
+    def _axis_tables(self, origin, length, scroll, bank_length):
+        size = self.tile_size
+        tile_at = []
+        for offset in range(length):
+            position = scroll + offset // self.zoom
+            tile_at.append(position // size * size if position < bank_length else -1)
+        screen_of = []
+        for tile in range(bank_length // size):
+            screen = origin + (tile * size - scroll) * self.zoom
+            visible = origin <= screen and screen + size * self.zoom <= origin + length
+            screen_of.append(screen if visible else None)
+        return tile_at, screen_of
+
+    def ensure_tables(self):
+        """
+        :jp 変換表が無ければ作ります
+        :en Build the lookup tables if they are missing
+        """
+        if self.tile_x_at is not None:
+            return
+        self.tile_y_at, self.screen_y_of = self._axis_tables(self.y, self.height, self.scroll_y, self.bank_height)
+        tile_x_at, self.screen_x_of = self._axis_tables(self.x, self.width, self.scroll_x, self.bank_width)
+        self.tile_x_at = tile_x_at
+        self.rebuilds += 1
+
+    def tile_at(self, screen_x, screen_y):
+        """
+        :jp 画面座標にあるタイルの座標 (x, y)（ピクセル, タイル単位に揃える）を返します（表示領域外なら None）
+        :en Return the tile coords (x, y) (pixels, tile aligned) at a screen position (None outside the view)
+        """
+        offset_x = screen_x - self.x
+        offset_y = screen_y - self.y
+        if not (0 <= offset_x < self.width and 0 <= offset_y < self.height):
+            return None
+        self.ensure_tables()
+        tile_x = self.tile_x_at[offset_x]
+        tile_y = self.tile_y_at[offset_y]
+        if tile_x < 0 or tile_y < 0:
+            return None
+        return tile_x, tile_y
+
+    def tile_screen(self, tile_x, tile_y):
+        """
+        :jp タイル座標の画面座標 (x, y) を返します（タイル全体が表示されていなければ None）
+        :en Return the screen coords (x, y) of a tile (None unless the whole tile is visible)
+        """
+        self.ensure_tables()
+        column = tile_x // self.tile_size
+        row = tile_y // self.tile_size
+        if not (0 <= column < len(self.screen_x_of) and 0 <= row < len(self.screen_y_of)):
+            return None
+        screen_x = self.screen_x_of[column]
+        screen_y = self.screen_y_of[row]
+        if screen_x is None or screen_y is None:
+            return None
+        return screen_x, screen_y
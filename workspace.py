@@ -0,0 +1,122 @@
+"""
+workspace - LRU cache of open projects (image bank pixels + sprite models)
+"""
+
+# :jp ソースコードの中のコメントは日本語、英語を併記してください
+# :en Comments in the source code should be written in both Japanese and English.
+
+import os
+import ctypes
+from collections import OrderedDict
+
+import pyxel
+
+# :jp 既定のメモリ予算（MiB）
+# :en Default memory budget (MiB)
+DEFAULT_BUDGET_MB = 64
+
+# :jp スプライト1件あたりのおおよそのメモリ量（予算計算用の見積もり）
+# :en Approximate memory per sprite (estimate for budget accounting)
+SPRITE_SIZE_ESTIMATE = 400
+
+
+def file_stamp(path):
+    """
+    :jp ファイルの変更検出用スタンプ (mtime_ns, size) を返します（存在しなければ None）
+    :en Return a change-detection stamp (mtime_ns, size) for a file (None if missing)
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def capture_banks():
+    """
+    :jp 現在のイメージバンク・タイルマップ・パレットの内容をコピーします
+    :en Copy the current image banks, tilemaps and palette
+    """
+    images = [bytes(image.data_ptr()) for image in pyxel.images]
+    tilemaps = [(bytes(tilemap.data_ptr()), tilemap.imgsrc) for tilemap in pyxel.tilemaps]
+    return {"images": images, "tilemaps": tilemaps, "colors": list(pyxel.colors)}
+
+
+def restore_banks(banks):
+    """
+    :jp capture_banks で保存した内容をイメージバンク・タイルマップ・パレットに書き戻します
+    :en Write contents saved by capture_banks back into the image banks, tilemaps and palette
+    """
+    for image, data in zip(pyxel.images, banks["images"]):
+        ctypes.memmove(image.data_ptr(), data, len(data))
+    for tilemap, (data, imgsrc) in zip(pyxel.tilemaps, banks["tilemaps"]):
+        ctypes.memmove(tilemap.data_ptr(), data, len(data))
+        if isinstance(imgsrc, int):
+            tilemap.imgsrc = imgsrc
+    pyxel.colors[:] = banks["colors"]
+
+
+class ProjectCache:
+    """
+    :jp 開いたプロジェクト（pyxres + JSON）をLRU順に保持し、メモリ予算を超えたら古いものから破棄します
+    :en Keeps open projects (pyxres + JSON) in LRU order and evicts the oldest when over budget
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.total = 0
+        # :jp pyxresの絶対パス -> エントリ（古い順）
+        # :en Absolute pyxres path -> entry (oldest first)
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def entry_size(entry):
+        """
+        :jp エントリのおおよそのメモリ量（バイト）を見積もります
+        :en Estimate the memory (bytes) held by an entry
+        """
+        banks = entry["banks"]
+        size = sum(len(data) for data in banks["images"])
+        size += sum(len(data) for data, _ in banks["tilemaps"])
+        sprite_data = entry.get("sprite_data") or {}
+        size += len(sprite_data.get("sprites", {})) * SPRITE_SIZE_ESTIMATE
+        return size
+
+    def get(self, pyxres_path, json_path):
+        """
+        :jp キャッシュ済みエントリを返します。ファイルが外部で変更されていれば破棄して None を返します
+        :en Return a cached entry; if the files changed on disk, drop it and return None
+        """
+        key = os.path.abspath(pyxres_path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["stamps"] != (file_stamp(pyxres_path), file_stamp(json_path)):
+            self.remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, pyxres_path, json_path, entry):
+        """
+        :jp エントリを登録（最新として）し、予算を超えた分を古い順に破棄します
+        :en Register an entry as most recent and evict the oldest while over budget
+        """
+        key = os.path.abspath(pyxres_path)
+        self.remove(key)
+        entry["stamps"] = (file_stamp(pyxres_path), file_stamp(json_path))
+        entry["size"] = self.entry_size(entry)
+        self.entries[key] = entry
+        self.total += entry["size"]
+
+        # :jp 最新の1件は予算を超えていても残す
+        # :en Always keep the most recent entry, even if it alone exceeds the budget
+        while self.total > self.budget and len(self.entries) > 1:
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.total -= evicted["size"]
+            print(f"Evicted cold project from cache: {os.path.basename(evicted_key)}")
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total -= entry["size"]